@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import itertools
+import os
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pulp import LpProblem, LpStatusOptimal, LpVariable, lpSum
+
+from main import (
+    DK_COLUMNS,
+    LineupConfig,
+    OptimizationParams,
+    Player,
+    PlayerColumns,
+    PlayerData,
+    _make_lineup,
+    _selected_players,
+    _solve,
+    build_lineup_problem,
+    filter_players,
+    group_by_position,
+    lineup_configs,
+    read_player_table,
+    validate_players_data,
+)
+
+PlayerKey = tuple[str, str]
+
+
+def load_projection_sources(
+    path: str | Path, sources: Sequence[str], columns: PlayerColumns = DK_COLUMNS
+) -> tuple[list[Player], np.ndarray]:
+    """Load the player pool with several projection columns
+
+    Returns the players, projected by the first source, and a (players, sources) matrix of every source's
+    projection in the same order. Rows missing any source are dropped.
+    """
+    if not sources:
+        raise ValueError('At least one projection source is required')
+
+    source_columns = columns.model_copy(update={'projection': sources[0]})
+    required = [column for column in (columns.salary, *sources) if column]
+    optional = [column for column in (columns.team, columns.opponent, columns.ownership) if column]
+    df = read_player_table(Path(path), [columns.name, columns.position, *dict.fromkeys(required), *optional], required)
+
+    players = validate_players_data(df, columns=source_columns)
+    keys = zip(df[columns.name].astype(str).str.strip(), df[columns.position].astype(str).str.strip())
+    rows = dict(zip(keys, df[list(sources)].to_numpy(dtype=float)))
+    return players, np.array([rows[(p.name, p.position)] for p in players]).reshape(len(players), len(sources))
+
+
+def blend_weights(source_count: int, steps: int) -> np.ndarray:
+    """Every weighting of source_count sources in increments of 1/steps that sums to 1, one per row
+
+    Three sources in fifths give 21 blends.
+    """
+    if source_count < 1 or steps < 1:
+        raise ValueError('source_count and steps must be at least 1')
+    grid = [
+        (*head, steps - sum(head))
+        for head in itertools.product(range(steps + 1), repeat=source_count - 1)
+        if sum(head) <= steps
+    ]
+    return np.array(grid, dtype=float) / steps
+
+
+def blend_projections(projections: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """(players, blends) projections for every weighting, as one matrix product"""
+    if projections.shape[1] != weights.shape[1]:
+        raise ValueError(f'{weights.shape[1]} weights per blend for {projections.shape[1]} projection sources')
+    return projections @ weights.T
+
+
+def _set_objective(
+    prob: LpProblem, player_vars: dict[str, dict[str, LpVariable]], keys: Sequence[PlayerKey], coefficients
+) -> None:
+    prob.setObjective(lpSum([coef * player_vars[pos][name] for (pos, name), coef in zip(keys, coefficients)]))
+
+
+def _sweep_blends(
+    player_data: PlayerData,
+    keys: Sequence[PlayerKey],
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    blended: np.ndarray,
+    limit: int,
+) -> list[list[list[PlayerKey]]]:
+    """The top lineups of each blend column, from one model whose objective is swapped per blend
+
+    Each blend's exclusion cuts are switched off before the next blend by raising their right-hand side to the
+    lineup size, so the constraint rows stay and the model is never rebuilt.
+    """
+    prob, player_vars = build_lineup_problem('Blend_Sweep', player_data, lineup_config, params)
+
+    results = []
+    for column in blended.T:
+        _set_objective(prob, player_vars, keys, column)
+        selections, cuts = [], []
+        for _ in range(limit):
+            if _solve(prob) != LpStatusOptimal:
+                break
+            selected = _selected_players(player_vars)
+            if not selected:
+                break
+            selections.append(selected)
+            cut_name = f'blend_cut_{len(prob.constraints())}'
+            prob += lpSum([player_vars[pos][name] for pos, name in selected]) <= len(selected) - 1, cut_name
+            cuts.append((cut_name, len(selected)))
+
+        for cut_name, size in cuts:
+            prob.get_constraint_by_name(cut_name).changeRHS(size)
+        results.append(selections)
+    return results
+
+
+def blend_sweep(
+    players: Sequence[Player],
+    projections: np.ndarray,
+    sources: Sequence[str],
+    weights: np.ndarray,
+    configs: dict[str, LineupConfig] | None = None,
+    params: OptimizationParams | None = None,
+    max_lineups: int = 1,
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """Optimize every config under every blend of the projection sources and report the lineups found
+
+    projections is the (players, sources) matrix from load_projection_sources and weights has one row per blend.
+    The blends are split into chunks that run across a process pool, and each chunk reuses one model per config.
+    The report has one row per lineup: the blend's weights, the lineup's blended score and its score under each
+    source. min_score and max_gap_from_optimal do not apply to sweeps.
+    """
+    params = params or OptimizationParams()
+    configs = lineup_configs if configs is None else configs
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+
+    # Later duplicates of a (position, name) replace earlier ones, as they do in group_by_position
+    row_of = {(p.position, p.name): row for row, p in enumerate(players)}
+    player_data = group_by_position(filter_players(players, params))
+    keys = [(pos, name) for pos in player_data for name in player_data[pos]]
+    source_projections = projections[[row_of[key] for key in keys]]
+    blended = blend_projections(source_projections, weights)
+
+    workers = max_workers or os.cpu_count() or 1
+    chunks = [chunk for chunk in np.array_split(np.arange(len(weights)), min(workers, len(weights))) if len(chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            (name, int(chunk[0])): executor.submit(
+                _sweep_blends, player_data, keys, config, params, blended[:, chunk], max_lineups
+            )
+            for name, config in configs.items()
+            for chunk in chunks
+        }
+        selections = {
+            (name, blend): selected
+            for (name, start), future in futures.items()
+            for blend, selected in enumerate(future.result(), start=start)
+        }
+
+    index = {key: row for row, key in enumerate(keys)}
+    rows = []
+    for blend, blend_weights_row in enumerate(weights):
+        blend_data = {
+            pos: {
+                name: entry._replace(projection=float(blended[index[(pos, name)], blend]))
+                for name, entry in players_dict.items()
+            }
+            for pos, players_dict in player_data.items()
+        }
+        for name in configs:
+            for lineup_num, selected in enumerate(selections[(name, blend)], start=1):
+                lineup = _make_lineup(lineup_num, selected, blend_data, params.salary_cap)
+                if lineup is None:
+                    continue
+                source_scores = source_projections[[index[key] for key in selected]].sum(axis=0)
+                rows.append(
+                    {
+                        'Blend': blend + 1,
+                        **dict(zip(sources, blend_weights_row.round(6).tolist())),
+                        'Config': name,
+                        'Lineup': lineup_num,
+                        'Blend Score': round(lineup.total_score, 2),
+                        **{f'{source} Score': round(score, 2) for source, score in zip(sources, source_scores)},
+                        'Total Salary': lineup.total_salary,
+                        'Players': ', '.join(player.name for player in lineup.players),
+                    }
+                )
+    return pd.DataFrame(rows)
+
+
+def blend_sweep_file(
+    path: str | Path,
+    sources: Sequence[str],
+    output_file: str | Path,
+    steps: int = 5,
+    columns: PlayerColumns = DK_COLUMNS,
+    configs: dict[str, LineupConfig] | None = None,
+    params: OptimizationParams | None = None,
+    max_lineups: int = 1,
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """Sweep every blend of the sources in increments of 1/steps and write the consolidated report"""
+    players, projections = load_projection_sources(path, sources, columns)
+    report = blend_sweep(
+        players, projections, sources, blend_weights(len(sources), steps), configs, params, max_lineups, max_workers
+    )
+    report.to_csv(output_file, index=False)
+    return report
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from main import SALARY_CAP, Lineup, LineupConfig, Player, lineup_configs, read_lineups_csv
+from portfolio import WORD_BITS, lineup_bitsets
+
+FIELD_ENTRIES = 100_000
+
+# Field lineups are sampled in chunks so the per-player sampling keys stay small
+SAMPLE_CHUNK = 25_000
+SAMPLING_ROUNDS = 20
+
+
+def _position_pools(players: Sequence[Player], lineup_config: LineupConfig) -> list[tuple[np.ndarray, np.ndarray, int]]:
+    """(player rows, log ownership, slots) for every position the config uses"""
+    pools = []
+    for pos, slots in lineup_config.model_dump(by_alias=True).items():
+        if not slots:
+            continue
+        rows = np.array([i for i, p in enumerate(players) if p.position == pos and p.ownership], dtype=np.int64)
+        if len(rows) < slots:
+            raise ValueError(f'Ownership is needed for at least {slots} {pos} players to simulate the field')
+        pools.append((rows, np.log([players[i].ownership for i in rows]), slots))
+    return pools
+
+
+def _sample_rosters(
+    rng: np.random.Generator, pools: Sequence[tuple[np.ndarray, np.ndarray, int]], count: int
+) -> np.ndarray:
+    """count rosters as player rows, each position drawn without replacement in proportion to ownership
+
+    Adding Gumbel noise to the log ownership and keeping the top keys per row samples without replacement, so a
+    whole chunk of rosters is drawn with one argpartition per position.
+    """
+    columns = []
+    for rows, log_ownership, slots in pools:
+        keys = log_ownership + rng.gumbel(size=(count, len(rows)))
+        columns.append(rows[np.argpartition(-keys, slots - 1, axis=1)[:, :slots]])
+    return np.hstack(columns)
+
+
+def simulate_field(
+    players: Sequence[Player],
+    configs: dict[str, LineupConfig] | None = None,
+    entries: int = FIELD_ENTRIES,
+    salary_cap: int = SALARY_CAP,
+    seed: int = 0,
+) -> list[np.ndarray]:
+    """Sample field lineups by ownership, split evenly across the configs, as one array of player rows per config
+
+    Rosters over the salary cap are rejected and redrawn. A config whose rosters rarely fit under the cap can come
+    back with fewer rows after SAMPLING_ROUNDS rounds, and with fewer entries than configs some get none.
+    """
+    configs = lineup_configs if configs is None else configs
+    rng = np.random.default_rng(seed)
+    salaries = np.array([p.salary for p in players], dtype=np.int64)
+
+    field = []
+    for index, config in enumerate(configs.values()):
+        pools = _position_pools(players, config)
+        wanted = entries // len(configs) + (index < entries % len(configs))
+        # Starts with no rows, so a config left with no entries still gets an empty array of its width
+        accepted, found = [np.empty((0, sum(slots for _, _, slots in pools)), dtype=np.int64)], 0
+        for _ in range(SAMPLING_ROUNDS):
+            if found >= wanted:
+                break
+            for start in range(0, wanted - found, SAMPLE_CHUNK):
+                rosters = _sample_rosters(rng, pools, min(SAMPLE_CHUNK, wanted - found - start))
+                rosters = rosters[salaries[rosters].sum(axis=1) <= salary_cap]
+                accepted.append(rosters)
+            found = sum(len(rosters) for rosters in accepted)
+        if found < wanted:
+            print(f'WARNING: Only {found} of {wanted} simulated field lineups fit under the salary cap')
+        field.append(np.vstack(accepted)[:wanted])
+    return field
+
+
+def _field_bitsets(field: Sequence[np.ndarray], bits: np.ndarray, words: int) -> np.ndarray:
+    """Encode field rosters of player rows with the bits lineup_bitsets gave each player"""
+    rosters = np.vstack(field)
+    bitsets = np.zeros((len(rosters), words), dtype=np.uint64)
+    row_index = np.arange(len(rosters))
+    for slot in range(rosters.shape[1]):
+        slot_bits = bits[rosters[:, slot]]
+        np.bitwise_or.at(
+            bitsets,
+            (row_index, slot_bits // WORD_BITS),
+            np.left_shift(np.uint64(1), (slot_bits % WORD_BITS).astype(np.uint64)),
+        )
+    return bitsets
+
+
+def expected_duplicates(
+    lineups: Sequence[Lineup],
+    players: Sequence[Player],
+    configs: dict[str, LineupConfig] | None = None,
+    entries: int = FIELD_ENTRIES,
+    field_size: int | None = None,
+    salary_cap: int = SALARY_CAP,
+    seed: int = 0,
+) -> np.ndarray:
+    """How many entrants of a field_size contest are expected to play each lineup, from a simulated field
+
+    Each lineup and field roster is a player bitset (see portfolio.lineup_bitsets). Identical rows are counted once
+    with np.unique, and each lineup's count is scaled from the simulated entries to field_size.
+    """
+    if not lineups:
+        return np.zeros(0)
+
+    player_index: dict[tuple[str, str], int] = {}
+    bits = np.array([player_index.setdefault((p.name, p.position), len(player_index)) for p in players], dtype=np.int64)
+    lineup_rows, player_index = lineup_bitsets(lineups, player_index)
+
+    field = simulate_field(players, configs, entries, salary_cap, seed)
+    simulated = sum(len(rosters) for rosters in field)
+    if not simulated:
+        return np.zeros(len(lineups))
+
+    field_rows = _field_bitsets(field, bits, lineup_rows.shape[1])
+    unique_rows, counts = np.unique(field_rows, axis=0, return_counts=True)
+    count_of = dict(zip(map(bytes, unique_rows), counts.tolist()))
+
+    matches = np.array([count_of.get(bytes(row), 0) for row in lineup_rows], dtype=float)
+    return matches * (field_size or entries) / simulated
+
+
+def rank_by_dup_risk(
+    lineups: Sequence[Lineup],
+    players: Sequence[Player],
+    penalty: float = 1.0,
+    configs: dict[str, LineupConfig] | None = None,
+    entries: int = FIELD_ENTRIES,
+    field_size: int | None = None,
+    salary_cap: int = SALARY_CAP,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Rank lineups by score minus penalty points per expected duplicate, best first
+
+    The players need an ownership value (see PlayerColumns.ownership). Input Rank is each lineup's position in
+    lineups, starting at 1.
+    """
+    duplicates = expected_duplicates(lineups, players, configs, entries, field_size, salary_cap, seed)
+    report = pd.DataFrame(
+        {
+            'Input Rank': np.arange(1, len(lineups) + 1),
+            'Lineup': [lineup.lineup_number for lineup in lineups],
+            'Total Score': [lineup.total_score for lineup in lineups],
+            'Expected Duplicates': duplicates.round(3),
+        }
+    )
+    report['Adjusted Score'] = (report['Total Score'] - penalty * duplicates).round(2)
+    return report.sort_values(['Adjusted Score', 'Input Rank'], ascending=[False, True], ignore_index=True)
+
+
+def rank_by_dup_risk_file(
+    lineup_file: str | Path,
+    players: Sequence[Player],
+    output_file: str | Path,
+    penalty: float = 1.0,
+    configs: dict[str, LineupConfig] | None = None,
+    entries: int = FIELD_ENTRIES,
+    field_size: int | None = None,
+    salary_cap: int = SALARY_CAP,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Re-rank a lineup CSV such as combined_lineups.csv by duplicate risk
+
+    The lineups are written to output_file in the new order, in the same layout, and the ranking report goes
+    next to it as <name>_dup_risk.csv.
+    """
+    lineups = read_lineups_csv(lineup_file)
+    report = rank_by_dup_risk(lineups, players, penalty, configs, entries, field_size, salary_cap, seed)
+
+    output_path = Path(output_file)
+    ranked = [lineups[rank - 1] for rank in report['Input Rank']]
+    pd.DataFrame([lineup.to_dict() for lineup in ranked]).to_csv(output_path, index=False, header=False)
+    report.to_csv(output_path.with_name(f'{output_path.stem}_dup_risk.csv'), index=False)
+    return report
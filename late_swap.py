@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import math
+import os
+from collections import Counter
+from collections.abc import Collection, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+from pulp import LpStatusOptimal
+
+from main import (
+    Lineup,
+    LineupConfig,
+    LineupPlayer,
+    OptimizationParams,
+    Player,
+    PlayerData,
+    PlayerEntry,
+    _selected_players,
+    build_lineup_problem,
+    filter_players,
+    group_by_position,
+    read_lineups_csv,
+)
+from solver import get_solver_session
+
+
+class LockedSlot(NamedTuple):
+    """A locked player as its lineup holds them, with the team and opponent the updated pool lists"""
+
+    position: str
+    name: str
+    salary: int
+    projection: float
+    team: str | None
+    opponent: str | None
+
+
+# Lineups sharing the same locked players and roster shape need the same re-solve
+SwapKey = tuple[frozenset[LockedSlot], tuple[tuple[str, int], ...]]
+
+_worker_player_data: PlayerData = {}
+_worker_params = OptimizationParams()
+
+
+def _init_worker(player_data: PlayerData, params: OptimizationParams) -> None:
+    global _worker_player_data, _worker_params
+    _worker_player_data = player_data
+    _worker_params = params
+
+
+def _swap_key(
+    lineup: Lineup, locked_players: Collection[str], teams: dict[str, tuple[str | None, str | None]]
+) -> SwapKey:
+    locked = frozenset(
+        LockedSlot(p.position, p.name, p.salary, p.projected_points, *teams.get(p.name, (None, None)))
+        for p in lineup.players
+        if p.name in locked_players
+    )
+    shape = tuple(sorted(Counter(p.position for p in lineup.players).items()))
+    return locked, shape
+
+
+def _solve_unlocked(key: SwapKey) -> list[tuple[str, str]] | None:
+    """Fill the unlocked slots with the best players for the whole lineup
+
+    The locked players are part of the model, fixed in with their lineup salary, so the salary cap, the position
+    counts and every team rule of the params cover the whole lineup.
+    """
+    locked, shape = key
+    lineup_config = LineupConfig(**(dict.fromkeys(('QB', 'RB', 'WR', 'TE', 'DST', 'K'), 0) | dict(shape)))
+    if len(locked) == lineup_config.total_players():
+        return []
+
+    player_data = {pos: dict(_worker_player_data.get(pos, {})) for pos, _ in shape}
+    for slot in locked:
+        player_data[slot.position][slot.name] = PlayerEntry(slot.projection, slot.salary, slot.team, slot.opponent)
+
+    locked_names = {slot.name for slot in locked}
+    params = _worker_params.model_copy(
+        update={'must_include_players': [*_worker_params.must_include_players, *sorted(locked_names)]}
+    )
+    prob, player_vars = build_lineup_problem('Late_Swap', player_data, lineup_config, params)
+    if get_solver_session().solve(prob) != LpStatusOptimal:
+        return None
+
+    selected = _selected_players(player_vars)
+    if len(selected) != lineup_config.total_players():
+        return None
+    return [(pos, player) for pos, player in selected if player not in locked_names]
+
+
+def late_swap(
+    lineups: Sequence[Lineup],
+    players: Sequence[Player],
+    locked_players: Collection[str],
+    params: OptimizationParams | None = None,
+    max_workers: int | None = None,
+) -> list[Lineup]:
+    """Re-optimize the unlocked slots of every lineup against an updated player pool
+
+    Players in locked_players keep their slot when they are in a lineup and cannot be added to any lineup. Each
+    re-solve models the whole lineup with its locked players fixed in, so the salary cap, position counts and
+    every rule of params (must-include players, team cap and stacking) hold for the swapped lineup. Entries that
+    share the same locks and roster shape are solved once, and the distinct re-solves run in a process pool. A
+    lineup whose open slots cannot be filled is returned unchanged.
+    """
+    params = params or OptimizationParams()
+    locked_players = set(locked_players)
+
+    pool = [p for p in filter_players(players, params) if p.name not in locked_players]
+    player_data = group_by_position(pool)
+
+    teams = {p.name: (p.team, p.opponent) for p in players}
+    keys = [_swap_key(lineup, locked_players, teams) for lineup in lineups]
+    unique_keys = list(dict.fromkeys(keys))
+
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, math.ceil(len(unique_keys) / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(player_data, params)) as executor:
+        solutions = dict(zip(unique_keys, executor.map(_solve_unlocked, unique_keys, chunksize=chunksize)))
+
+    # Locked players are scored with their updated projection when the pool still lists them
+    projections = {p.name: p.projection for p in players}
+
+    swapped = []
+    for lineup, key in zip(lineups, keys):
+        selected = solutions[key]
+        if selected is None:
+            print(f'Warning: Could not fill the open slots of lineup {lineup.lineup_number}; keeping it unchanged')
+            swapped.append(lineup)
+            continue
+
+        # Put each new player into an open slot of the same position so the roster order is preserved
+        incoming = {pos: [name for p, name in selected if p == pos] for pos, _ in selected}
+        lineup_players = []
+        for slot in lineup.players:
+            if slot.name in locked_players:
+                lineup_players.append(
+                    slot.model_copy(update={'projected_points': projections.get(slot.name, slot.projected_points)})
+                )
+            else:
+                name = incoming[slot.position].pop(0)
+                entry = player_data[slot.position][name]
+                lineup_players.append(
+                    LineupPlayer(
+                        position=slot.position, name=name, salary=entry.salary, projected_points=entry.projection
+                    )
+                )
+
+        swapped.append(
+            Lineup.model_validate(
+                {
+                    'lineup_number': lineup.lineup_number,
+                    'players': lineup_players,
+                    'total_salary': sum(p.salary for p in lineup_players),
+                    'total_score': sum(p.projected_points for p in lineup_players),
+                },
+                context={'salary_cap': params.salary_cap},
+            )
+        )
+
+    return swapped
+
+
+def late_swap_file(
+    lineup_file: str | Path,
+    players: Sequence[Player],
+    locked_players: Collection[str],
+    output_file: str | Path,
+    params: OptimizationParams | None = None,
+    max_workers: int | None = None,
+) -> list[Lineup]:
+    """Late-swap every lineup in a lineup CSV written by calculate_lineups and write the result in the same format"""
+    swapped = late_swap(read_lineups_csv(lineup_file), players, locked_players, params, max_workers)
+    pd.DataFrame([lineup.to_dict() for lineup in swapped]).to_csv(output_file, index=False, header=False)
+    return swapped
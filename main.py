@@ -1,12 +1,30 @@
 from __future__ import annotations
 
+import csv
+import hashlib
+import heapq
+import itertools
+import os
+import re
 import time
-from collections.abc import Sequence
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Literal, NamedTuple, TextIO
 
+import numpy as np
 import pandas as pd
-from pulp import PULP_CBC_CMD, LpMaximize, LpProblem, LpVariable, lpSum
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pulp import LpMaximize, LpProblem, LpSolutionOptimal, LpStatusOptimal, LpVariable, lpSum, value
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
+
+from memory_profile import MemoryProfiler
+from sharding import LocalProcessExecutor, ShardExecutor
+from solver import get_solver_session
+
+if TYPE_CHECKING:
+    from solution_pool import SolutionPool
 
 POSITION = 'DK Pos'
 PROJECTION = 'DK Proj'
@@ -16,6 +34,35 @@ TOTAL_SCORE = 'Total Score'
 
 SALARY_CAP = 50000
 MAX_LINEUPS = 10
+PRINTED_LINEUPS = 15
+SCORE_TOLERANCE = 1e-6
+
+# Positions the team rules look at
+QB_POSITIONS = ('QB',)
+STACK_POSITIONS = ('WR', 'TE')
+BRING_BACK_POSITIONS = ('RB', 'WR', 'TE')
+DST_POSITIONS = ('DST',)
+
+PARQUET_SUFFIXES = {'.parquet', '.pq'}
+ARROW_SUFFIXES = {'.arrow', '.feather'}
+PLAYER_CACHE_SUFFIX = '.players.npy'
+
+
+class PlayerColumns(BaseModel):
+    """Input column names for one file format; formats without salaries give every player a salary of 0"""
+
+    name: str = PLAYER
+    position: str = POSITION
+    projection: str = PROJECTION
+    salary: str | None = SALARY
+    team: str | None = None
+    opponent: str | None = None
+
+    # Projected field ownership in percent, used by the duplicate-risk stage (see dup_risk.py)
+    ownership: str | None = None
+
+
+DK_COLUMNS = PlayerColumns()
 
 
 class Player(BaseModel):
@@ -25,10 +72,14 @@ class Player(BaseModel):
     position: str = Field(..., min_length=1)
     salary: int = Field(..., ge=0, le=SALARY_CAP)
     projection: float = Field(..., ge=0)
+    slate: str | None = None
+    team: str | None = None
+    opponent: str | None = None
+    ownership: float | None = Field(None, ge=0)
 
     @field_validator('position')
     def validate_position(cls, v):
-        valid_positions = {'QB', 'RB', 'WR', 'TE', 'DST'}
+        valid_positions = {'QB', 'RB', 'WR', 'TE', 'K', 'DST'}
         if v not in valid_positions:
             raise ValueError(f'Position must be one of {valid_positions}')
         return v
@@ -44,9 +95,23 @@ class LineupConfig(BaseModel):
     wr: int = Field(..., ge=0, le=5, alias='WR')
     te: int = Field(..., ge=0, le=3, alias='TE')
     dst: int = Field(..., ge=0, le=2, alias='DST')
+    k: int = Field(0, ge=0, le=2, alias='K')
 
     def total_players(self) -> int:
-        return self.qb + self.rb + self.wr + self.te + self.dst
+        return self.qb + self.rb + self.wr + self.te + self.dst + self.k
+
+
+class PlayerEntry(NamedTuple):
+    """What the model needs to know about one player"""
+
+    projection: float
+    salary: int
+    team: str | None = None
+    opponent: str | None = None
+
+
+# {position: {name: PlayerEntry}}
+PlayerData = dict[str, dict[str, PlayerEntry]]
 
 
 class LineupPlayer(BaseModel):
@@ -63,13 +128,15 @@ class Lineup(BaseModel):
 
     lineup_number: int = Field(..., ge=1)
     players: list[LineupPlayer] = Field(..., min_length=1)
-    total_salary: int = Field(..., ge=0, le=SALARY_CAP)
+    total_salary: int = Field(..., ge=0)
     total_score: float = Field(..., ge=0)
 
     @field_validator('total_salary')
-    def validate_salary_cap(cls, v):
-        if v > SALARY_CAP:
-            raise ValueError(f'Total salary {v} exceeds salary cap {SALARY_CAP}')
+    def validate_salary_cap(cls, v, info: ValidationInfo):
+        # The cap can be given per run as validation context; None skips the check
+        salary_cap = (info.context or {}).get('salary_cap', SALARY_CAP)
+        if salary_cap is not None and v > salary_cap:
+            raise ValueError(f'Total salary {v} exceeds salary cap {salary_cap}')
         return v
 
     def to_dict(self) -> dict:
@@ -95,6 +162,36 @@ class OptimizationParams(BaseModel):
     only_use_players: list[str] = Field(default_factory=list)
     exclude_players: list[str] = Field(default_factory=list)
 
+    # Randomized mode: std dev of the per-player noise as a fraction of the player's projection (0 = disabled)
+    perturbation: float = Field(0.0, ge=0)
+    perturbed_solves: int = Field(MAX_LINEUPS, ge=1)
+    random_seed: int = 0
+    max_workers: int | None = Field(None, ge=1)
+
+    # Stop enumerating once no further lineup can reach min_score or score within the gap of the optimal lineup
+    min_score: float | None = None
+    max_gap_from_optimal: float | None = Field(None, ge=0)
+
+    # Sharded mode: partition the search by fixing the QB (or the QB and DST pair) and merge the shards' top lineups
+    shard_by: Literal['QB', 'QB_DST'] | None = None
+
+    salary_cap: int = Field(SALARY_CAP, ge=0)
+
+    # At most this many players from one team (needs a team column, see PlayerColumns)
+    max_players_per_team: int | None = Field(None, ge=1)
+
+    # Correlation rules (need team and opponent columns): pass catchers from the QB's team, players from the
+    # QB's opponent, and no DST facing one of the lineup's QBs
+    qb_stack: int = Field(0, ge=0)
+    bring_back: int = Field(0, ge=0)
+    no_dst_vs_qb: bool = False
+
+    # Also write <output>_sensitivity.csv with each player's projection break-even point for the optimal lineup.
+    # Players whose LP bound puts them more than sensitivity_window points away get that bound instead of a
+    # re-solve (None re-solves every player).
+    sensitivity_report: bool = False
+    sensitivity_window: float | None = Field(1.0, ge=0)
+
     @field_validator('must_include_players', 'only_use_players', 'exclude_players', mode='before')
     @classmethod
     def convert_none_to_empty_list(cls, v):
@@ -108,21 +205,40 @@ lineup_configs = {
 }
 
 
-def validate_players_data(df: pd.DataFrame) -> list[Player]:
+def _optional_text(row: pd.Series, column: str | None) -> str | None:
+    if not column or pd.isna(row[column]):
+        return None
+    return str(row[column]).strip() or None
+
+
+def _optional_percent(row: pd.Series, column: str | None) -> float | None:
+    text = _optional_text(row, column)
+    return None if text is None else float(text.rstrip('%'))
+
+
+def validate_players_data(
+    df: pd.DataFrame, slate_column: str | None = None, columns: PlayerColumns = DK_COLUMNS
+) -> list[Player]:
     """Validate and convert DataFrame to list of Player models"""
     players = []
 
     for _, row in df.iterrows():
         try:
             # Convert salary from string to int
-            salary_str = str(row[SALARY]).replace('$', '').replace(',', '')
-            salary = int(float(salary_str))
+            salary = 0
+            if columns.salary:
+                salary_str = str(row[columns.salary]).replace('$', '').replace(',', '')
+                salary = int(float(salary_str))
 
             player = Player(
-                name=str(row[PLAYER]).strip(),
-                position=str(row[POSITION]).strip(),
+                name=str(row[columns.name]).strip(),
+                position=str(row[columns.position]).strip(),
                 salary=salary,
-                projection=float(row[PROJECTION]),
+                projection=float(row[columns.projection]),
+                slate=str(row[slate_column]).strip() if slate_column else None,
+                team=_optional_text(row, columns.team),
+                opponent=_optional_text(row, columns.opponent),
+                ownership=_optional_percent(row, columns.ownership),
             )
             players.append(player)
         except (ValueError, KeyError) as e:
@@ -132,13 +248,862 @@ def validate_players_data(df: pd.DataFrame) -> list[Player]:
     return players
 
 
-def calculate_lineups(
+def read_player_table(
+    path: Path, columns: Sequence[str], required: Sequence[str] = (SALARY, PROJECTION)
+) -> pd.DataFrame:
+    """Read the raw player table from a CSV, Parquet or Arrow/Feather file"""
+    suffix = path.suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        df = pd.read_parquet(path, columns=list(columns))
+    elif suffix in ARROW_SUFFIXES:
+        df = pd.read_feather(path, columns=list(columns))
+    else:
+        df = pd.read_csv(path, usecols=list(columns))
+
+    df = df.apply(lambda x: x.str.strip() if x.dtype == 'object' else x)
+    return df.dropna(subset=list(required))
+
+
+def player_cache_path(path: Path, slate_column: str | None = None, columns: PlayerColumns = DK_COLUMNS) -> Path:
+    """Location of the binary player cache stored next to the source file
+
+    The name carries a digest of the column mapping, so loading the same file with another mapping is a cache miss.
+    """
+    key = '.' + re.sub(r'\W+', '_', slate_column) if slate_column else ''
+    digest = hashlib.sha256(columns.model_dump_json().encode()).hexdigest()[:12]
+    return path.with_name(f'{path.name}{key}.{digest}{PLAYER_CACHE_SUFFIX}')
+
+
+# Optional string fields are cached as empty strings and optional numbers as NaN, and both are restored as None
+_CACHE_STRING_FIELDS = ('name', 'position', 'slate', 'team', 'opponent')
+_CACHE_NUMERIC_FIELDS = (('salary', 'i8'), ('projection', 'f8'), ('ownership', 'f8'))
+_CACHE_OPTIONAL_NUMERIC_FIELDS = ('ownership',)
+
+
+def _player_dtype(players: Sequence[Player]) -> np.dtype:
+    string_fields = [
+        (field, f'U{max((len(getattr(p, field) or "") for p in players), default=0) or 1}')
+        for field in _CACHE_STRING_FIELDS
+    ]
+    return np.dtype(string_fields + list(_CACHE_NUMERIC_FIELDS))
+
+
+def _cache_value(player: Player, field: str):
+    value = getattr(player, field)
+    if field in _CACHE_STRING_FIELDS:
+        return value or ''
+    if value is None and field in _CACHE_OPTIONAL_NUMERIC_FIELDS:
+        return np.nan
+    return value
+
+
+def _players_to_array(players: Sequence[Player]) -> np.ndarray:
+    dtype = _player_dtype(players)
+    records = [tuple(_cache_value(p, field) for field in dtype.names) for p in players]
+    return np.array(records, dtype=dtype)
+
+
+def _array_to_players(array: np.ndarray) -> list[Player]:
+    columns = {field: array[field].tolist() for field in array.dtype.names}
+    for field in _CACHE_STRING_FIELDS:
+        columns[field] = [value or None for value in columns[field]]
+    for field in _CACHE_OPTIONAL_NUMERIC_FIELDS:
+        columns[field] = [None if np.isnan(value) else value for value in columns[field]]
+
+    # Rows were validated before they were cached, so skip validation on the way back out
+    return [Player.model_construct(**dict(zip(columns, values))) for values in zip(*columns.values())]
+
+
+def _read_player_cache(source: Path, slate_column: str | None, columns: PlayerColumns) -> list[Player] | None:
+    cache_path = player_cache_path(source, slate_column, columns)
+    try:
+        if cache_path.stat().st_mtime_ns < source.stat().st_mtime_ns:
+            return None
+        array = np.load(cache_path, mmap_mode='r')
+    except OSError, ValueError:
+        return None
+
+    if array.dtype.names != _player_dtype([]).names:
+        return None
+
+    return _array_to_players(array)
+
+
+def _write_player_cache(
+    source: Path, slate_column: str | None, columns: PlayerColumns, players: Sequence[Player]
+) -> None:
+    cache_path = player_cache_path(source, slate_column, columns)
+    tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+    try:
+        with tmp_path.open('wb') as f:
+            np.save(f, _players_to_array(players))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f'Warning: Could not write player cache {cache_path}: {e}')
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_players(
+    path: str | Path,
+    use_cache: bool = False,
+    slate_column: str | None = None,
+    columns: PlayerColumns = DK_COLUMNS,
+) -> list[Player]:
+    """Load and validate the player pool, optionally through a memory-mapped cache next to the source file"""
+    source = Path(path)
+
+    if use_cache:
+        cached = _read_player_cache(source, slate_column, columns)
+        if cached is not None:
+            return cached
+
+    required = [column for column in (columns.salary, columns.projection) if column]
+    optional = [column for column in (columns.team, columns.opponent, columns.ownership, slate_column) if column]
+
+    players_df = read_player_table(source, [columns.name, columns.position, *required, *optional], required)
+    if slate_column:
+        players_df = players_df.dropna(subset=[slate_column])
+    players = validate_players_data(players_df, slate_column, columns)
+
+    if use_cache and players:
+        _write_player_cache(source, slate_column, columns, players)
+
+    return players
+
+
+def group_players_by_slate(players: Sequence[Player]) -> dict[str, list[Player]]:
+    """Split a multi-slate pool into one player list per slate, keeping input order"""
+    slates: dict[str, list[Player]] = {}
+    for player in players:
+        slates.setdefault(player.slate or '', []).append(player)
+    return slates
+
+
+def filter_players(players: Sequence[Player], params: OptimizationParams) -> list[Player]:
+    """Apply the only-use and exclude lists to the player pool"""
+    filtered_players = list(players)
+
+    if params.only_use_players:
+        filtered_players = [p for p in filtered_players if p.name in params.only_use_players]
+
+    if params.exclude_players:
+        filtered_players = [p for p in filtered_players if p.name not in params.exclude_players]
+
+    return filtered_players
+
+
+def group_by_position(players: Sequence[Player]) -> PlayerData:
+    """Group players by position as {position: {name: PlayerEntry}}"""
+    player_data = {}
+    for player in players:
+        if player.position not in player_data:
+            player_data[player.position] = {}
+        player_data[player.position][player.name] = PlayerEntry(
+            player.projection, player.salary, player.team, player.opponent
+        )
+    return player_data
+
+
+def team_index(player_data: PlayerData) -> dict[str, list[tuple[str, str]]]:
+    """Every team's (position, name) players; players without a team are left out"""
+    teams: dict[str, list[tuple[str, str]]] = {}
+    for pos, players_dict in player_data.items():
+        for name, entry in players_dict.items():
+            if entry.team is not None:
+                teams.setdefault(entry.team, []).append((pos, name))
+    return teams
+
+
+def opponent_index(player_data: PlayerData) -> dict[str, str]:
+    """Each team's opponent, from the players that list one"""
+    return {
+        entry.team: entry.opponent
+        for players_dict in player_data.values()
+        for entry in players_dict.values()
+        if entry.team is not None and entry.opponent is not None
+    }
+
+
+class TeamIndex(NamedTuple):
+    """The team and opponent indexes of one filtered pool, built once and shared by every model of that pool"""
+
+    players: dict[str, list[tuple[str, str]]]
+    opponents: dict[str, str]
+
+
+def build_team_index(player_data: PlayerData) -> TeamIndex:
+    return TeamIndex(team_index(player_data), opponent_index(player_data))
+
+
+def _add_team_rules(
+    prob: LpProblem,
+    player_vars: dict[str, dict[str, LpVariable]],
+    teams: TeamIndex,
+    max_qbs: int,
+    params: OptimizationParams,
+) -> None:
+    """Add the team cap and correlation rules as one aggregated constraint per team
+
+    With q_t the number of QBs taken from team t, the stack needs qb_stack pass catchers from t per QB, the
+    bring-back needs bring_back players from t's opponent per QB, and a DST facing t is only allowed when q_t is 0;
+    max_qbs, the most QBs a lineup can hold, bounds q_t in that last rule. Team caps that can never bind are left
+    out, and players of the index missing from the model (a shard of the pool) are skipped.
+    """
+
+    def team_vars(team: str | None, positions: Sequence[str] | None = None) -> list[LpVariable]:
+        return [
+            player_vars[pos][name]
+            for pos, name in teams.players.get(team, [])
+            if (positions is None or pos in positions) and name in player_vars.get(pos, {})
+        ]
+
+    for team in teams.players:
+        if params.max_players_per_team is not None:
+            team_players = team_vars(team)
+            if len(team_players) > params.max_players_per_team:
+                prob += lpSum(team_players) <= params.max_players_per_team, f'Team_{team}_constraint'
+
+        qbs = team_vars(team, QB_POSITIONS)
+        if not qbs:
+            continue
+        if params.qb_stack:
+            prob += lpSum(team_vars(team, STACK_POSITIONS)) >= params.qb_stack * lpSum(qbs), f'QB_Stack_{team}'
+
+        opponent = teams.opponents.get(team)
+        if opponent is None:
+            continue
+        if params.bring_back:
+            bring_back = lpSum(team_vars(opponent, BRING_BACK_POSITIONS))
+            prob += bring_back >= params.bring_back * lpSum(qbs), f'Bring_Back_{team}'
+        if params.no_dst_vs_qb and max_qbs:
+            dsts = team_vars(opponent, DST_POSITIONS)
+            if dsts:
+                prob += lpSum(qbs) + max_qbs * lpSum(dsts) <= max_qbs, f'No_DST_vs_QB_{team}'
+
+
+def _warn_ignored_team_rules(players: Sequence[Player], params: OptimizationParams, has_opponents: bool) -> None:
+    """Warn about the team rules of params that the pool has no team or opponent data for"""
+    team_rules = params.max_players_per_team is not None or params.qb_stack or params.bring_back
+    if (team_rules or params.no_dst_vs_qb) and not any(p.team for p in players):
+        print('WARNING: Team rules need a team column (see PlayerColumns); ignoring them')
+    elif (params.bring_back or params.no_dst_vs_qb) and not has_opponents:
+        print('WARNING: Bring-back and DST rules need an opponent column (see PlayerColumns); ignoring them')
+
+
+def build_lineup_problem(
+    name: str,
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    previous_lineups: Sequence[Sequence[tuple[str, str]]] = (),
+    projections: dict[tuple[str, str], float] | None = None,
+    min_score: float | None = None,
+    relax: bool = False,
+    salary_cap: int | None = None,
+    teams: TeamIndex | None = None,
+) -> tuple[LpProblem, dict[str, dict[str, LpVariable]]]:
+    """Build the lineup model
+
+    projections overrides the objective coefficients, min_score cuts off lineups scoring below it and relax
+    builds the LP relaxation (continuous 0-1 variables) used for upper bounds. salary_cap defaults to the
+    params' cap. teams is the pool's TeamIndex for the team rules, built from player_data when not given.
+    """
+    salary_cap = params.salary_cap if salary_cap is None else salary_cap
+    prob = LpProblem(name, LpMaximize)
+
+    player_vars = {}
+    for pos, players_dict in player_data.items():
+        if relax:
+            player_vars[pos] = LpVariable.dicts(f'{pos}_players', players_dict.keys(), lowBound=0, upBound=1)
+        else:
+            player_vars[pos] = LpVariable.dicts(f'{pos}_players', players_dict.keys(), cat='Binary')
+
+    def objective_coefficient(pos: str, player: str) -> float:
+        return projections[(pos, player)] if projections is not None else player_data[pos][player].projection
+
+    total_points = lpSum(
+        [
+            objective_coefficient(pos, player) * player_vars[pos][player]
+            for pos in player_vars
+            for player in player_vars[pos]
+        ]
+    )
+    prob += total_points, 'Total_Points'
+
+    # Lineups scoring below the threshold are not wanted, so let the solver prune them
+    if min_score is not None:
+        prob += total_points >= min_score - SCORE_TOLERANCE, 'Min_Score'
+
+    # Salary constraint
+    prob += (
+        lpSum(
+            [
+                player_data[pos][player].salary * player_vars[pos][player]
+                for pos in player_vars
+                for player in player_vars[pos]
+            ]
+        )
+        <= salary_cap,
+        'Salary_Cap',
+    )
+
+    # Enforce lineup constraints (how many players from each position)
+    lineup_dict = lineup_config.model_dump(by_alias=True)
+    for pos, count in lineup_dict.items():
+        if pos in player_vars:
+            prob += lpSum([player_vars[pos][player] for player in player_vars[pos]]) == count, f'{pos}_constraint'
+
+    # Enforce must-include players
+    for must_include in params.must_include_players:
+        for pos in player_vars:
+            if must_include in player_vars[pos]:
+                prob += player_vars[pos][must_include] == 1, f'must_include_{must_include}'
+                break
+
+    if params.max_players_per_team is not None or params.qb_stack or params.bring_back or params.no_dst_vs_qb:
+        _add_team_rules(prob, player_vars, teams or build_team_index(player_data), lineup_config.qb, params)
+
+    # Add unique lineup constraints
+    for counter, prev_lineup in enumerate(previous_lineups):
+        prob += (
+            lpSum([player_vars[pos][player] for pos, player in prev_lineup]) <= len(prev_lineup) - 1,
+            f'unique_lineup_{counter}',
+        )
+
+    return prob, player_vars
+
+
+def _set_min_score(prob: LpProblem, min_score: float) -> None:
+    # Move the score floor in place so the model is never rebuilt for a new threshold
+    constraint = prob.get_constraint_by_name('Min_Score')
+    if constraint is None:
+        prob += prob.objective >= min_score - SCORE_TOLERANCE, 'Min_Score'
+    else:
+        constraint.changeRHS(min_score - SCORE_TOLERANCE)
+
+
+def _solve(prob: LpProblem, time_limit: float | None = None) -> int:
+    return get_solver_session().solve(prob, time_limit)
+
+
+def _selected_players(player_vars: dict[str, dict[str, LpVariable]]) -> list[tuple[str, str]]:
+    return [(pos, player) for pos in player_vars for player, var in player_vars[pos].items() if var.varValue == 1]
+
+
+def _make_lineup(
+    lineup_num: int,
+    selected: Sequence[tuple[str, str]],
+    player_data: PlayerData,
+    salary_cap: int = SALARY_CAP,
+) -> Lineup | None:
+    lineup_players = []
+    total_score = 0
+    total_salary = 0
+
+    for pos, player_name in selected:
+        entry = player_data[pos][player_name]
+        lineup_players.append(
+            LineupPlayer(position=pos, name=player_name, salary=entry.salary, projected_points=entry.projection)
+        )
+        total_score += entry.projection
+        total_salary += entry.salary
+
+    try:
+        return Lineup.model_validate(
+            {
+                'lineup_number': lineup_num,
+                'players': lineup_players,
+                'total_salary': total_salary,
+                'total_score': total_score,
+            },
+            context={'salary_cap': salary_cap},
+        )
+    except ValueError as e:
+        print(f'Warning: Invalid lineup generated: {e}')
+        return None
+
+
+def _lineup_upper_bound(
+    name: str,
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    teams: TeamIndex | None = None,
+) -> float | None:
+    prob, _ = build_lineup_problem(f'{name}_bound', player_data, lineup_config, params, relax=True, teams=teams)
+    if _solve(prob) != LpStatusOptimal:
+        return None
+    return value(prob.objective)
+
+
+def lineup_upper_bound(
+    lineup_config: LineupConfig, players: Sequence[Player], params: OptimizationParams
+) -> float | None:
+    """Upper bound on any lineup's score from the LP relaxation (None when no lineup is feasible)"""
+    player_data = group_by_position(filter_players(players, params))
+    if not player_data:
+        return None
+    return _lineup_upper_bound('Fantasy', player_data, lineup_config, params)
+
+
+def lineup_upper_bounds(
+    configs: dict[str, LineupConfig], players: Sequence[Player], params: OptimizationParams
+) -> dict[str, float | None]:
+    """lineup_upper_bound for several configs, solved as one batch"""
+    player_data = group_by_position(filter_players(players, params))
+    if not player_data:
+        return dict.fromkeys(configs)
+
+    teams = build_team_index(player_data)
+    problems = {
+        name: build_lineup_problem(f'Fantasy_{name}_bound', player_data, config, params, relax=True, teams=teams)[0]
+        for name, config in configs.items()
+    }
+    statuses = get_solver_session().solve_batch(list(problems.values()))
+    return {
+        name: value(prob.objective) if status == LpStatusOptimal else None
+        for (name, prob), status in zip(problems.items(), statuses)
+    }
+
+
+def _enumerate_lineups(
+    output_file: str,
+    player_data: PlayerData,
     lineup_config: LineupConfig,
+    params: OptimizationParams,
+    limit: int = MAX_LINEUPS,
+) -> list[Lineup]:
+    """Find the best lineups in order by re-solving with a cut for every lineup already found"""
+    lineup_results, _ = _enumerate_lineups_until(output_file, player_data, lineup_config, params, limit)
+    return lineup_results
+
+
+def _enumerate_lineups_until(
+    output_file: str,
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    limit: int = MAX_LINEUPS,
+    deadline: float | None = None,
+    on_lineup: Callable[[Lineup], None] | None = None,
+    previous_lineups: list[list[tuple[str, str]]] | None = None,
+    teams: TeamIndex | None = None,
+) -> tuple[list[Lineup], bool]:
+    """Enumerate lineups until done or until the time.monotonic() deadline; also returns whether it finished
+
+    Every solve gets the remaining time as its limit. A solve cut short by the deadline is discarded, because its
+    incumbent is not guaranteed to be the next-best lineup, so the lineups returned are always the exact top ones.
+    previous_lineups resumes an earlier enumeration from its cuts and gets every new cut appended; only the new
+    lineups are returned. teams is the pool's TeamIndex, built here when not given.
+    """
+    lineup_results = []
+    previous_lineups = [] if previous_lineups is None else previous_lineups
+    teams = teams or build_team_index(player_data)
+
+    # Stop before the first solve when even the LP relaxation cannot reach the requested score
+    min_score = params.min_score
+    if min_score is not None:
+        upper_bound = _lineup_upper_bound(f'Fantasy_{output_file}', player_data, lineup_config, params, teams)
+        if upper_bound is None or upper_bound < min_score - SCORE_TOLERANCE:
+            print(f'Skipping {output_file}: no lineup can reach the minimum score of {min_score:.1f}')
+            return [], True
+
+    if previous_lineups and params.max_gap_from_optimal is not None:
+        optimal_score = sum(player_data[pos][player].projection for pos, player in previous_lineups[0])
+        gap_floor = optimal_score - params.max_gap_from_optimal
+        min_score = gap_floor if min_score is None else max(min_score, gap_floor)
+
+    # One model for the whole enumeration: every lineup found only adds its exclusion cut
+    prob, player_vars = build_lineup_problem(
+        f'Fantasy_{output_file}', player_data, lineup_config, params, previous_lineups, min_score=min_score, teams=teams
+    )
+
+    for lineup_num in range(len(previous_lineups) + 1, limit + 1):
+        time_limit = None
+        if deadline is not None:
+            time_limit = deadline - time.monotonic()
+            if time_limit <= 0:
+                return lineup_results, False
+
+        _solve(prob, time_limit)
+
+        if deadline is not None and prob.sol_status != LpSolutionOptimal and time.monotonic() >= deadline:
+            return lineup_results, False
+
+        # The pool has run out of lineups (or, with a score floor, of lineups reaching it). cbc still hands back
+        # its last incumbent for an infeasible model, so nothing may be read from it.
+        if prob.status != LpStatusOptimal:
+            break
+
+        current_lineup_players = _selected_players(player_vars)
+
+        if not current_lineup_players or len(previous_lineups) >= limit:
+            break
+
+        previous_lineups.append(current_lineup_players)
+        prob += (
+            lpSum([player_vars[pos][player] for pos, player in current_lineup_players])
+            <= len(current_lineup_players) - 1,
+            f'unique_lineup_{len(previous_lineups) - 1}',
+        )
+
+        if lineup_num == 1 and params.max_gap_from_optimal is not None:
+            optimal_score = sum(player_data[pos][player].projection for pos, player in current_lineup_players)
+            gap_floor = optimal_score - params.max_gap_from_optimal
+            min_score = gap_floor if min_score is None else max(min_score, gap_floor)
+            _set_min_score(prob, min_score)
+
+        lineup = _make_lineup(lineup_num, current_lineup_players, player_data, params.salary_cap)
+        if lineup is not None:
+            lineup_results.append(lineup)
+            if on_lineup is not None:
+                on_lineup(lineup)
+
+    return lineup_results, True
+
+
+def _pooled_lineups(
     output_file: str,
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    solution_pool: SolutionPool,
+    limit: int = MAX_LINEUPS,
+    deadline: float | None = None,
+    on_lineup: Callable[[Lineup], None] | None = None,
+    teams: TeamIndex | None = None,
+) -> tuple[list[Lineup], bool]:
+    """_enumerate_lineups_until starting where the pool's stored run stopped, storing what it finds"""
+    stored = solution_pool.load(player_data, lineup_config, params)
+    lineup_results = [lineup for lineup in stored.lineups if lineup.lineup_number <= limit]
+    if on_lineup is not None:
+        for lineup in lineup_results:
+            on_lineup(lineup)
+
+    if stored.exhausted or len(stored.cuts) >= limit:
+        return lineup_results, True
+    if stored.cuts:
+        print(f'Resuming {output_file} at lineup {len(stored.cuts) + 1} from the solution pool')
+
+    cuts = stored.cuts
+    new_lineups, complete = _enumerate_lineups_until(
+        output_file, player_data, lineup_config, params, limit, deadline, on_lineup, previous_lineups=cuts, teams=teams
+    )
+    solution_pool.save(player_data, lineup_config, params, cuts, new_lineups, exhausted=complete and len(cuts) < limit)
+    return lineup_results + new_lineups, complete
+
+
+def _solve_perturbed(
+    output_file: str,
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    teams: TeamIndex,
+    solve_index: int,
+) -> list[tuple[str, str]]:
+    """Solve once against projections with seeded per-player noise"""
+    keys = [(pos, player) for pos in player_data for player in player_data[pos]]
+    base = np.array([player_data[pos][player].projection for pos, player in keys])
+
+    # Seeding from (seed, solve index) keeps every solve reproducible regardless of which worker runs it
+    rng = np.random.default_rng([params.random_seed, solve_index])
+    perturbed = np.maximum(base + rng.normal(0.0, 1.0, len(base)) * base * params.perturbation, 0.0)
+
+    prob, player_vars = build_lineup_problem(
+        f'Fantasy_{output_file}_perturbed_{solve_index}',
+        player_data,
+        lineup_config,
+        params,
+        projections=dict(zip(keys, perturbed.tolist())),
+        teams=teams,
+    )
+    if _solve(prob) != LpStatusOptimal:
+        return []
+
+    return _selected_players(player_vars)
+
+
+def _perturbed_lineups(
+    output_file: str,
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    limit: int = MAX_LINEUPS,
+    teams: TeamIndex | None = None,
+) -> list[Lineup]:
+    """Generate lineups from independent solves against perturbed projections, run across a process pool"""
+    teams = teams or build_team_index(player_data)
+    with ProcessPoolExecutor(max_workers=params.max_workers) as executor:
+        solve = partial(_solve_perturbed, output_file, player_data, lineup_config, params, teams)
+        solutions = list(executor.map(solve, range(params.perturbed_solves)))
+
+    unique_lineups = []
+    seen = set()
+    for selected in solutions:
+        key = frozenset(selected)
+        if selected and key not in seen:
+            seen.add(key)
+            unique_lineups.append(selected)
+
+    # Rank the distinct lineups by their unperturbed score
+    unique_lineups.sort(key=lambda selected: -sum(player_data[pos][player].projection for pos, player in selected))
+
+    lineup_results = []
+    for selected in unique_lineups[:limit]:
+        lineup = _make_lineup(len(lineup_results) + 1, selected, player_data, params.salary_cap)
+        if lineup is not None:
+            lineup_results.append(lineup)
+
+    return lineup_results
+
+
+def _shard_player_data(
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+) -> list[PlayerData] | None:
+    """Split the pool into disjoint shards, one per fixed QB (or QB and DST pair)"""
+    shard_positions = ['QB', 'DST'] if params.shard_by == 'QB_DST' else ['QB']
+    lineup_dict = lineup_config.model_dump(by_alias=True)
+    if any(lineup_dict[pos] != 1 for pos in shard_positions):
+        return None
+
+    candidates = []
+    for pos in shard_positions:
+        names = list(player_data.get(pos, {}))
+        # A must-include player at a sharded position can only appear in its own shards
+        required = [name for name in params.must_include_players if name in player_data.get(pos, {})]
+        candidates.append(required or names)
+
+    return [
+        {**player_data, **{pos: {name: player_data[pos][name]} for pos, name in zip(shard_positions, fixed)}}
+        for fixed in itertools.product(*candidates)
+    ]
+
+
+def _sharded_lineups(
+    output_file: str,
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    executor: ShardExecutor,
+    limit: int = MAX_LINEUPS,
+) -> list[Lineup]:
+    """Enumerate each shard's top lineups independently and K-way merge them into the global top lineups"""
+    shards = _shard_player_data(player_data, lineup_config, params)
+    if shards is None:
+        print(f'WARNING: Sharding by {params.shard_by} needs exactly one player per sharded position; not sharding')
+        return _enumerate_lineups(output_file, player_data, lineup_config, params, limit)
+
+    names = [f'{output_file}_shard_{index}' for index in range(len(shards))]
+
+    # First pass: every shard's best lineup. These are distinct lineups, so the limit-th best of them is a lower
+    # bound on the global limit-th best score and shards whose best lineup falls below it are skipped.
+    shard_best = executor.map(
+        _enumerate_lineups,
+        names,
+        shards,
+        itertools.repeat(lineup_config),
+        itertools.repeat(params),
+        itertools.repeat(1),
+    )
+    best_scores = sorted((lineups[0].total_score for lineups in shard_best if lineups), reverse=True)
+    cutoff = best_scores[limit - 1] if len(best_scores) >= limit else None
+    if cutoff is not None and params.min_score is not None:
+        cutoff = max(cutoff, params.min_score)
+
+    remaining = [
+        index
+        for index, lineups in enumerate(shard_best)
+        if lineups and (cutoff is None or lineups[0].total_score >= cutoff - SCORE_TOLERANCE)
+    ]
+    shard_params = params if cutoff is None else params.model_copy(update={'min_score': cutoff})
+
+    # Second pass: enumerate the surviving shards down to the cutoff
+    shard_results = executor.map(
+        _enumerate_lineups,
+        [names[index] for index in remaining],
+        [shards[index] for index in remaining],
+        itertools.repeat(lineup_config),
+        itertools.repeat(shard_params),
+        itertools.repeat(limit),
+    )
+
+    # Every shard is already in descending score order
+    merged = heapq.merge(*shard_results, key=lambda lineup: -lineup.total_score)
+
+    lineup_results = []
+    min_score = None
+    for lineup in itertools.islice(merged, limit):
+        if min_score is None and params.max_gap_from_optimal is not None:
+            min_score = lineup.total_score - params.max_gap_from_optimal
+        if min_score is not None and lineup.total_score < min_score - SCORE_TOLERANCE:
+            break
+        lineup_results.append(lineup.model_copy(update={'lineup_number': len(lineup_results) + 1}))
+
+    return lineup_results
+
+
+def _fixed_variable_bound(var: LpVariable, target: int, relaxed_score: float) -> float:
+    """Upper bound on the LP relaxation's score once var is fixed at target, from its reduced cost
+
+    Only a variable sitting at the other bound gives one; any other variable is bounded by the relaxation itself.
+    """
+    if var.varValue is None or abs(var.varValue - (1 - target)) > SCORE_TOLERANCE:
+        return relaxed_score
+    return relaxed_score - abs(var.dj or 0.0)
+
+
+def sensitivity_report(
+    output_file: str,
+    player_data: PlayerData,
+    lineup_config: LineupConfig,
+    params: OptimizationParams,
+    lineups: Sequence[Lineup] = (),
+    teams: TeamIndex | None = None,
+) -> pd.DataFrame:
+    """Projection break-even points for every player relative to the optimal lineup
+
+    A player outside the optimal lineup enters once their projection rises by the gap between the optimal score and
+    the best lineup containing them. A player in it leaves once their projection drops by the gap to the best
+    lineup without them. Lineups already enumerated in descending score order answer these directly: the first
+    lineup containing (or missing) a player is the best one, and a player none of them answers scores at most the
+    last one.
+
+    The other players are bounded from one solve of the LP relaxation: fixing a variable that sits at its other
+    bound costs at least its reduced cost. Only players whose bound leaves them within params.sensitivity_window
+    points of the optimal score are re-solved, each on the same model with that player's variable bound fixed.
+    The rest are reported with the bound, so their Change Needed is a minimum and Exact is False.
+    """
+    best_with: dict[tuple[str, str], float] = {}
+    best_without: dict[tuple[str, str], float] = {}
+
+    teams = teams or build_team_index(player_data)
+    prob, player_vars = build_lineup_problem(
+        f'Fantasy_{output_file}_sensitivity', player_data, lineup_config, params, teams=teams
+    )
+
+    if lineups:
+        optimal = {(p.position, p.name) for p in lineups[0].players}
+        optimal_score = lineups[0].total_score
+    else:
+        if _solve(prob) != LpStatusOptimal:
+            return pd.DataFrame()
+        optimal = set(_selected_players(player_vars))
+        optimal_score = value(prob.objective)
+
+    for lineup in lineups:
+        keys = {(p.position, p.name) for p in lineup.players}
+        for key in keys - optimal:
+            best_with.setdefault(key, lineup.total_score)
+        for key in optimal - keys:
+            best_without.setdefault(key, lineup.total_score)
+
+    # Enumerated lineups are the exact top ones, so a player missing from their answers is below the last of them
+    enumerated_floor = lineups[-1].total_score if lineups else None
+
+    relaxed, relaxed_vars = build_lineup_problem(
+        f'Fantasy_{output_file}_sensitivity_bound', player_data, lineup_config, params, relax=True, teams=teams
+    )
+    relaxed_score = value(relaxed.objective) if _solve(relaxed) == LpStatusOptimal else None
+
+    must_include = set(params.must_include_players)
+    window = params.sensitivity_window
+    rows = []
+    for pos, players_dict in player_data.items():
+        for name, entry in players_dict.items():
+            key = (pos, name)
+            in_optimal = key in optimal
+            known = best_without if in_optimal else best_with
+            exact = key in known or (in_optimal and name in must_include)
+
+            alternative = known.get(key)
+            if not exact:
+                bounds = [] if enumerated_floor is None else [enumerated_floor]
+                if relaxed_score is not None:
+                    bounds.append(_fixed_variable_bound(relaxed_vars[pos][name], 0 if in_optimal else 1, relaxed_score))
+                bound = min(bounds, default=None)
+
+                if bound is not None and window is not None and optimal_score - bound > window + SCORE_TOLERANCE:
+                    alternative = bound
+                else:
+                    var = player_vars[pos][name]
+                    if in_optimal:
+                        var.upBound = 0
+                    else:
+                        var.lowBound = 1
+                    alternative = value(prob.objective) if _solve(prob) == LpStatusOptimal else None
+                    var.lowBound, var.upBound = 0, 1
+                    exact = True
+
+            change = None
+            if alternative is not None:
+                change = round(alternative - optimal_score if in_optimal else optimal_score - alternative, 4)
+
+            rows.append(
+                {
+                    PLAYER: name,
+                    'Position': pos,
+                    'Salary': entry.salary,
+                    'Projection': entry.projection,
+                    'In Optimal': in_optimal,
+                    'Alternative Score': alternative,
+                    'Change Needed': change,
+                    'Break-even Projection': None if change is None else entry.projection + change,
+                    'Exact': exact,
+                }
+            )
+
+    return pd.DataFrame(rows)
+
+
+def calculate_lineups(
+    lineup_config: LineupConfig,
+    output_file: str | Path | None,
     players: list[Player],
     params: OptimizationParams,
+    shard_executor: ShardExecutor | None = None,
+    max_lineups: int = MAX_LINEUPS,
+    solution_pool: SolutionPool | None = None,
+    name: str | None = None,
 ) -> list[Lineup]:
-    """Calculate optimal lineups using Pydantic models"""
+    """Calculate optimal lineups using Pydantic models
+
+    With a solution_pool, sequential enumeration continues from the lineups and cuts stored by earlier runs of
+    the same slate, config and params, so asking for more lineups only solves for the new ones. With no
+    output_file the lineups are only returned; name (default 'lineups') then labels the run in messages.
+    """
+    lineup_results, _ = _calculate_lineups(
+        lineup_config,
+        output_file,
+        players,
+        params,
+        shard_executor,
+        max_lineups=max_lineups,
+        solution_pool=solution_pool,
+        name=name,
+    )
+    return lineup_results
+
+
+def _calculate_lineups(
+    lineup_config: LineupConfig,
+    output_file: str | Path | None,
+    players: list[Player],
+    params: OptimizationParams,
+    shard_executor: ShardExecutor | None = None,
+    deadline: float | None = None,
+    max_lineups: int = MAX_LINEUPS,
+    solution_pool: SolutionPool | None = None,
+    name: str | None = None,
+) -> tuple[list[Lineup], bool]:
+    """calculate_lineups with an optional time.monotonic() deadline; also returns whether the config finished
+
+    With a deadline, the output file is rewritten with every lineup as soon as it is found, so whatever was
+    reached when time runs out is already on disk. With no output_file nothing is written; name (default
+    'lineups') then labels the run in messages.
+    """
+    label = name or ('lineups' if output_file is None else str(output_file))
 
     # Validate parameters
     all_player_names = {p.name for p in players}
@@ -155,14 +1120,10 @@ def calculate_lineups(
     if missing_exclude:
         print(f'WARNING: Exclude players not found in CSV: {", ".join(missing_exclude)}')
 
-    # Filter players based on parameters
-    filtered_players = players
+    _warn_ignored_team_rules(players, params, has_opponents=any(p.opponent for p in players))
 
-    if params.only_use_players:
-        filtered_players = [p for p in filtered_players if p.name in params.only_use_players]
-
-    if params.exclude_players:
-        filtered_players = [p for p in filtered_players if p.name not in params.exclude_players]
+    # Filter players based on parameters
+    filtered_players = filter_players(players, params)
 
     remaining_player_names = {p.name for p in filtered_players}
     unmet_must_include = sorted(set(params.must_include_players) - remaining_player_names)
@@ -171,109 +1132,430 @@ def calculate_lineups(
 
     if not filtered_players:
         print('WARNING: No eligible players remain after filtering; skipping lineup generation.')
-        return []
+        return [], True
+
+    player_data = group_by_position(filtered_players)
+    teams = build_team_index(player_data)
+
+    output_path = None
+    if output_file is not None:
+        output_path = Path(output_file)
+        if output_path.suffix != '.csv':
+            output_path = output_path.with_suffix('.csv')
+
+    complete = True
+    if deadline is not None and (params.perturbation > 0 or params.shard_by):
+        print('WARNING: Deadlines only apply to sequential enumeration; running without one')
+    if solution_pool is not None and (params.perturbation > 0 or params.shard_by):
+        print('WARNING: The solution pool only applies to sequential enumeration; not resuming')
+
+    if params.perturbation > 0:
+        lineup_results = _perturbed_lineups(label, player_data, lineup_config, params, max_lineups, teams)
+    elif params.shard_by:
+        executor = shard_executor or LocalProcessExecutor(params.max_workers)
+        lineup_results = _sharded_lineups(label, player_data, lineup_config, params, executor, max_lineups)
+    else:
+        append_lineup = None
+        if deadline is not None and output_path is not None:
+            output_path.write_text('')
+
+            def append_lineup(lineup: Lineup) -> None:
+                pd.DataFrame([lineup.to_dict()]).to_csv(output_path, mode='a', index=False, header=False)
+
+        if solution_pool is not None:
+            lineup_results, complete = _pooled_lineups(
+                label, player_data, lineup_config, params, solution_pool, max_lineups, deadline, append_lineup, teams
+            )
+        else:
+            lineup_results, complete = _enumerate_lineups_until(
+                label, player_data, lineup_config, params, max_lineups, deadline, append_lineup, teams=teams
+            )
 
-    # Group players by position
-    player_data = {}
-    for player in filtered_players:
-        if player.position not in player_data:
-            player_data[player.position] = {}
-        player_data[player.position][player.name] = (player.projection, player.salary)
+    if output_path is None:
+        return lineup_results, complete
 
-    lineup_results = []
-    previous_lineups = []
+    # Write the individual files
+    lineup_dicts = [lineup.to_dict() for lineup in lineup_results]
+    pd.DataFrame(lineup_dicts).to_csv(output_path, index=False, header=False)
 
-    for lineup_num in range(1, MAX_LINEUPS + 1):
-        prob = LpProblem(f'Fantasy_{output_file}_{lineup_num}', LpMaximize)
+    if params.sensitivity_report and complete:
+        # Randomized lineups are not in exact score order, so they cannot seed the report
+        ordered_lineups = lineup_results if params.perturbation == 0 else []
+        report = sensitivity_report(label, player_data, lineup_config, params, ordered_lineups, teams)
+        report.to_csv(output_path.with_name(f'{output_path.stem}_sensitivity.csv'), index=False)
 
-        player_vars = {}
-        for pos, players_dict in player_data.items():
-            player_vars[pos] = LpVariable.dicts(f'{pos}_players', players_dict.keys(), cat='Binary')
+    return lineup_results, complete
 
-        prob += (
-            lpSum(
-                [
-                    player_data[pos][player][0] * player_vars[pos][player]
-                    for pos in player_vars
-                    for player in player_vars[pos]
-                ]
-            ),
-            'Total_Points',
-        )
 
-        # Salary constraint
-        prob += (
-            lpSum(
-                [
-                    player_data[pos][player][1] * player_vars[pos][player]
-                    for pos in player_vars
-                    for player in player_vars[pos]
-                ]
+def merge_lineups(lineup_sequences: Iterable[Iterable[Lineup]]) -> Iterator[Lineup]:
+    """Lazily K-way merge lineup sequences that are each already in descending score order"""
+    return heapq.merge(*lineup_sequences, key=lambda lineup: -lineup.total_score)
+
+
+def _lineup_row(lineup: Lineup) -> list:
+    row = [lineup.lineup_number]
+    for player in lineup.players:
+        row.extend((player.position, player.name, player.salary, player.projected_points))
+    row.extend((lineup.total_salary, round(lineup.total_score, 1)))
+    return row
+
+
+def _write_combined_csv(
+    lineup_sequences: Iterable[Iterable[Lineup]], output: Path | TextIO, keep: int = 0
+) -> list[Lineup]:
+    """Stream the merged lineups to a file path or an open text stream one row at a time, returning the first keep"""
+    if isinstance(output, Path):
+        with output.open('w', newline='') as f:
+            return _write_combined_csv(lineup_sequences, f, keep)
+
+    top_lineups = []
+    writer = csv.writer(output, lineterminator=os.linesep)
+    for lineup in merge_lineups(lineup_sequences):
+        writer.writerow(_lineup_row(lineup))
+        if len(top_lineups) < keep:
+            top_lineups.append(lineup)
+    return top_lineups
+
+
+def read_lineups_csv(path: str | Path) -> list[Lineup]:
+    """Read lineups back from a per-config or combined lineup file written by this module"""
+    try:
+        df = pd.read_csv(path, header=None)
+    except pd.errors.EmptyDataError:
+        return []
+    player_count = (df.shape[1] - 3) // 4
+
+    lineups = []
+    for row in df.itertuples(index=False):
+        lineup_players = [
+            LineupPlayer(
+                position=row[1 + 4 * i],
+                name=row[2 + 4 * i],
+                salary=int(row[3 + 4 * i]),
+                projected_points=float(row[4 + 4 * i]),
+            )
+            for i in range(player_count)
+        ]
+        # The file may come from a run with a different salary cap, so the cap is not checked again
+        lineups.append(
+            Lineup.model_validate(
+                {
+                    'lineup_number': int(row[0]),
+                    'players': lineup_players,
+                    'total_salary': int(row[-2]),
+                    'total_score': float(row[-1]),
+                },
+                context={'salary_cap': None},
             )
-            <= SALARY_CAP,
-            'Salary_Cap',
         )
 
-        # Enforce lineup constraints (how many players from each position)
-        lineup_dict = lineup_config.model_dump(by_alias=True)
-        for pos, count in lineup_dict.items():
-            if pos in player_vars and count > 0:
-                prob += lpSum([player_vars[pos][player] for player in player_vars[pos]]) == count, f'{pos}_constraint'
-
-        # Enforce must-include players
-        for must_include in params.must_include_players:
-            for pos in player_vars:
-                if must_include in player_vars[pos]:
-                    prob += player_vars[pos][must_include] == 1, f'must_include_{must_include}'
-                    break
-
-        # Add unique lineup constraints
-        for counter, prev_lineup in enumerate(previous_lineups):
-            prob += (
-                lpSum([player_vars[pos][player] for pos, player in prev_lineup]) <= len(prev_lineup) - 1,
-                f'unique_lineup_{lineup_num}_{counter}',
-            )
+    return lineups
 
-        prob.solve(PULP_CBC_CMD(msg=False))
 
-        current_lineup_players = [
-            (pos, player) for pos in player_vars for player, var in player_vars[pos].items() if var.varValue == 1
-        ]
+def write_combined_lineups(lineup_sequences: Iterable[Sequence[Lineup]], output_file: Path) -> None:
+    """Merge every config's lineups by score into one file and print the top of the list
 
-        if not current_lineup_players or len(previous_lineups) >= MAX_LINEUPS:
-            break
+    Each sequence must already be in descending score order, as calculate_lineups returns them.
+    """
+    lineup_sequences = list(lineup_sequences)
+    if not any(lineup_sequences):
+        print('No lineups were generated.')
+        return
 
-        previous_lineups.append(current_lineup_players)
+    print_lineups(_write_combined_csv(lineup_sequences, output_file, keep=PRINTED_LINEUPS))
 
-        # Create Lineup object
-        lineup_players = []
-        total_score = 0
-        total_salary = 0
 
-        for pos, player_name in current_lineup_players:
-            proj, sal = player_data[pos][player_name]
-            lineup_players.append(LineupPlayer(position=pos, name=player_name, salary=sal, projected_points=proj))
-            total_score += proj
-            total_salary += sal
+def print_lineups(top_lineups: Sequence[Lineup]) -> None:
+    """Print lineups as a table"""
+    # Only the printed rows are formatted, with every string column truncated to 12 characters
+    print_df = pd.DataFrame([lineup.to_dict() for lineup in top_lineups])
+    for col in print_df.columns:
+        if pd.api.types.is_string_dtype(print_df[col]) or print_df[col].dtype == 'object':
+            print_df.loc[:, col] = print_df[col].astype(str).str[:12]
 
-        try:
-            lineup = Lineup(
-                lineup_number=lineup_num, players=lineup_players, total_salary=total_salary, total_score=total_score
+    print(print_df.to_string(index=False, header=False))
+
+
+def _profile_phase(profiler: MemoryProfiler | None, name: str) -> AbstractContextManager:
+    return nullcontext() if profiler is None else profiler.phase(name)
+
+
+def _calculate_config_lineups(
+    configs: dict[str, LineupConfig],
+    players: Sequence[Player],
+    params: OptimizationParams,
+    top_n: int | None = None,
+    deadline: float | None = None,
+    max_lineups: int = MAX_LINEUPS,
+    solution_pool: SolutionPool | None = None,
+    output_dir: Path | None = None,
+    profiler: MemoryProfiler | None = None,
+) -> tuple[dict[str, list[Lineup]], dict[str, bool]]:
+    """Run every config, returning each config's lineups and whether it finished
+
+    With top_n, configs run best bound first and skip whatever cannot reach the running top-N cutoff. With a
+    time.monotonic() deadline, each config gets an equal share of the time left, time a config does not use
+    passes on to the next ones, and combined_lineups.csv is rewritten after each config. Files go to output_dir,
+    and nothing is written without one. A profiler records the bounds and each config as a phase.
+    """
+    names = list(configs)
+    if top_n:
+        with _profile_phase(profiler, 'upper_bounds'):
+            bounds = lineup_upper_bounds(configs, players, params)
+        names.sort(key=lambda n: bounds[n] if bounds[n] is not None else float('-inf'), reverse=True)
+
+    lineups_by_config: dict[str, list[Lineup]] = {}
+    completed: dict[str, bool] = {}
+    top_scores: list[float] = []  # min-heap of the best top_n scores so far
+    for index, name in enumerate(names):
+        config_params = params
+        if top_n and len(top_scores) >= top_n:
+            cutoff = top_scores[0] if params.min_score is None else max(top_scores[0], params.min_score)
+            config_params = params.model_copy(update={'min_score': cutoff})
+
+        config_deadline = None
+        if deadline is not None:
+            now = time.monotonic()
+            config_deadline = now + max(deadline - now, 0) / (len(names) - index)
+
+        with _profile_phase(profiler, f'config:{name}'):
+            lineups, completed[name] = _calculate_lineups(
+                configs[name],
+                None if output_dir is None else output_dir / name,
+                players,
+                config_params,
+                deadline=config_deadline,
+                max_lineups=max_lineups,
+                solution_pool=solution_pool,
+                name=name,
             )
-            lineup_results.append(lineup)
-        except ValueError as e:
-            print(f'Warning: Invalid lineup generated: {e}')
-            continue
+        lineups_by_config[name] = lineups
 
-    # Write the individual files
-    output_path = Path(output_file)
-    if output_path.suffix != '.csv':
-        output_path = output_path.with_suffix('.csv')
+        if deadline is not None and output_dir is not None:
+            _write_combined_csv(lineups_by_config.values(), output_dir / 'combined_lineups.csv')
 
-    lineup_dicts = [lineup.to_dict() for lineup in lineup_results]
-    pd.DataFrame(lineup_dicts).to_csv(output_path, index=False, header=False)
+        if top_n:
+            for lineup in lineups:
+                if len(top_scores) < top_n:
+                    heapq.heappush(top_scores, lineup.total_score)
+                else:
+                    heapq.heappushpop(top_scores, lineup.total_score)
 
-    return lineup_results
+    return lineups_by_config, completed
+
+
+class OptimizationResult(BaseModel):
+    """Every config's lineups in descending score order, and whether each config finished"""
+
+    lineups_by_config: dict[str, list[Lineup]]
+    completed: dict[str, bool]
+
+    def combined(self) -> list[Lineup]:
+        """All lineups merged by score, as combined_lineups.csv lists them"""
+        return list(merge_lineups(self.lineups_by_config.values()))
+
+    def status(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [
+                {
+                    'Config': name,
+                    'Status': 'complete' if self.completed[name] else 'truncated',
+                    'Lineups': len(lineups),
+                }
+                for name, lineups in self.lineups_by_config.items()
+            ]
+        )
+
+
+def optimize_lineups(
+    players: Sequence[Player],
+    configs: dict[str, LineupConfig] | None = None,
+    params: OptimizationParams | None = None,
+    max_lineups: int = MAX_LINEUPS,
+    output: str | Path | TextIO | None = None,
+    top_n: int | None = None,
+    time_budget: float | None = None,
+    solution_pool: SolutionPool | None = None,
+    profiler: MemoryProfiler | None = None,
+) -> OptimizationResult:
+    """Optimize every lineup config (the DraftKings ones unless configs is given) and return the lineups
+
+    Everything a run depends on, including the salary cap in params, is passed in, so runs in several threads of
+    one process do not share state. output is where files go: a directory gets the per-config files,
+    combined_lineups.csv and (with a time_budget) lineup_status.csv; an open text stream gets only the combined
+    rows; None writes nothing. A profiler records the bounds, each config and the combined output as phases.
+    """
+    params = params or OptimizationParams()
+    configs = lineup_configs if configs is None else configs
+
+    output_dir = None
+    if isinstance(output, (str, Path)):
+        output_dir = Path(output)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    lineups_by_config, completed = _calculate_config_lineups(
+        configs, players, params, top_n, deadline, max_lineups, solution_pool, output_dir, profiler
+    )
+    result = OptimizationResult(lineups_by_config=lineups_by_config, completed=completed)
+
+    with _profile_phase(profiler, 'combined_lineups'):
+        if output_dir is not None:
+            if deadline is not None:
+                result.status().to_csv(output_dir / 'lineup_status.csv', index=False)
+            if any(lineups_by_config.values()):
+                _write_combined_csv(lineups_by_config.values(), output_dir / 'combined_lineups.csv')
+        elif output is not None:
+            _write_combined_csv(lineups_by_config.values(), output)
+
+    return result
+
+
+def slate_dirs(slates: Iterable[str], output_dir: str | Path = '.') -> dict[str, Path]:
+    """One output directory per slate under output_dir, named after the slate
+
+    Slates whose sanitized names are the same (ignoring case, for case-insensitive filesystems) get _2, _3, ...
+    suffixes in input order, so no two slates share a directory.
+    """
+    root = Path(output_dir).resolve()
+    dirs: dict[str, Path] = {}
+    taken: set[str] = set()
+    for slate in slates:
+        base = re.sub(r'[^\w.-]+', '_', slate).strip('.') or 'slate'
+        dir_name, suffix = base, 1
+        while dir_name.lower() in taken:
+            suffix += 1
+            dir_name = f'{base}_{suffix}'
+        taken.add(dir_name.lower())
+        dirs[slate] = root / dir_name
+    return dirs
+
+
+def _optimize_slate(
+    configs: dict[str, LineupConfig],
+    players: Sequence[Player],
+    params: OptimizationParams,
+    top_n: int | None,
+    lock_time: float | None,
+    max_lineups: int,
+    solution_pool: SolutionPool | None,
+    output_dir: Path,
+) -> OptimizationResult:
+    """Run one slate's configs in a worker process
+
+    lock_time is a time.time() deadline shared by every slate, so a slate that waited for a free worker only gets
+    what is left of the budget.
+    """
+    deadline = None if lock_time is None else time.monotonic() + lock_time - time.time()
+    lineups_by_config, completed = _calculate_config_lineups(
+        configs, players, params, top_n, deadline, max_lineups, solution_pool, output_dir
+    )
+    return OptimizationResult(lineups_by_config=lineups_by_config, completed=completed)
+
+
+def generate_slate_lineup_files(
+    players: Sequence[Player],
+    configs: dict[str, LineupConfig],
+    params: OptimizationParams,
+    max_workers: int | None = None,
+    max_lineups: int = MAX_LINEUPS,
+    solution_pool: SolutionPool | None = None,
+    output_dir: str | Path = '.',
+    top_n: int | None = None,
+    time_budget: float | None = None,
+) -> None:
+    """Optimize every slate's lineup configs in parallel into one directory per slate under output_dir
+
+    The directories are named by slate_dirs, and slate_summary.csv goes to output_dir. top_n applies per slate and
+    time_budget to the whole run, with each slate directory getting its own lineup_status.csv. With either one a
+    slate's configs depend on each other (the top-N cutoff and the time left carry from one config to the next),
+    so each slate runs its configs in one worker instead of one worker per config.
+    """
+    slates = group_players_by_slate(players)
+    output_root = Path(output_dir).resolve()
+    slate_output_dirs = slate_dirs(slates, output_root)
+    for slate_dir in slate_output_dirs.values():
+        slate_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f'Optimizing {len(slates)} slates: {", ".join(slates)}')
+
+    lock_time = None if time_budget is None else time.time() + time_budget
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        if top_n or time_budget is not None:
+            slate_futures = {
+                slate: executor.submit(
+                    _optimize_slate,
+                    configs,
+                    slate_players,
+                    params,
+                    top_n,
+                    lock_time,
+                    max_lineups,
+                    solution_pool,
+                    slate_output_dirs[slate],
+                )
+                for slate, slate_players in slates.items()
+            }
+            results = {slate: future.result() for slate, future in slate_futures.items()}
+        else:
+            futures = {
+                (slate, name): executor.submit(
+                    calculate_lineups,
+                    config,
+                    str(slate_output_dirs[slate] / name),
+                    slate_players,
+                    params,
+                    max_lineups=max_lineups,
+                    solution_pool=solution_pool,
+                )
+                for slate, slate_players in slates.items()
+                for name, config in configs.items()
+            }
+            results = {
+                slate: OptimizationResult(
+                    lineups_by_config={name: futures[(slate, name)].result() for name in configs},
+                    completed=dict.fromkeys(configs, True),
+                )
+                for slate in slates
+            }
+
+    summary = []
+    for slate, slate_players in slates.items():
+        result = results[slate]
+        config_lineups = list(result.lineups_by_config.values())
+
+        print(f'\nSlate {slate}:')
+        if time_budget is not None:
+            result.status().to_csv(slate_output_dirs[slate] / 'lineup_status.csv', index=False)
+            for row in result.status().itertuples(index=False):
+                print(f'{row.Config}: {row.Status} ({row.Lineups} lineups)')
+        write_combined_lineups(config_lineups, slate_output_dirs[slate] / 'combined_lineups.csv')
+
+        summary.append(
+            {
+                'Slate': slate,
+                'Players': len(slate_players),
+                'Lineups': sum(len(lineups) for lineups in config_lineups),
+                'Best Score': max((lineups[0].total_score for lineups in config_lineups if lineups), default=None),
+                'Output Directory': str(slate_output_dirs[slate]),
+            }
+        )
+
+    summary_path = output_root / 'slate_summary.csv'
+    pd.DataFrame(summary).to_csv(summary_path, index=False)
+    print(f'Slate summary written to {summary_path}')
+
+
+@contextmanager
+def _memory_profiling(path: str | Path | None) -> Iterator[MemoryProfiler | None]:
+    """A MemoryProfiler that writes its reports to path when the run ends, or None when path is None"""
+    if path is None:
+        yield None
+        return
+    with MemoryProfiler() as profiler:
+        yield profiler
+    report, allocations = profiler.write(path)
+    print(f'Memory profile written to {report} and {allocations}')
 
 
 def generate_lineup_files(
@@ -282,73 +1564,115 @@ def generate_lineup_files(
     only_use_players: Sequence[str] | None = None,
     exclude_players: Sequence[str] | None = None,
     allow_two_te: bool = True,
+    use_cache: bool = False,
+    slate_column: str | None = None,
+    max_workers: int | None = None,
+    top_n: int | None = None,
+    time_budget: float | None = None,
+    max_lineups: int = MAX_LINEUPS,
+    solution_pool: SolutionPool | None = None,
+    configs: dict[str, LineupConfig] | None = None,
+    columns: PlayerColumns = DK_COLUMNS,
+    max_players_per_team: int | None = None,
+    qb_stack: int = 0,
+    bring_back: int = 0,
+    no_dst_vs_qb: bool = False,
+    memory_profile: str | Path | None = None,
+    output_dir: str | Path = '.',
 ) -> None:
-    csv_path = Path(csv_file)
+    """Optimize every lineup config (the DraftKings ones unless configs is given) from one parse of the file
 
-    try:
-        players_df = pd.read_csv(csv_path, usecols=[PLAYER, POSITION, PROJECTION, SALARY])
-        players_df = players_df.apply(lambda x: x.str.strip() if x.dtype == 'object' else x)
-        players_df = players_df.dropna(subset=[SALARY, PROJECTION])
-    except FileNotFoundError:
-        print(f"Error: Input file '{csv_path}' not found.")
-        return
-    except ValueError as e:
-        print(f'Error processing {csv_path}: {e}')
-        return
+    Output files go to output_dir, in one subdirectory per slate when slate_column is given.
 
-    # Convert to Player objects with validation
-    players = validate_players_data(players_df)
+    memory_profile names a CSV for the tracemalloc phase report (loading, bounds, each config and the combined
+    output); the top allocation sites of each phase go next to it as <name>_allocations.csv. tracemalloc only
+    sees this process, so memory_profile raises ValueError with slate_column, where every slate runs in a worker
+    process.
+    """
+    if memory_profile is not None and slate_column:
+        raise ValueError('memory_profile cannot trace the per-slate worker processes; profile one slate at a time')
 
-    if not players:
-        print('Error: No valid players found in the data.')
-        return
+    with _memory_profiling(memory_profile) as profiler:
+        csv_path = Path(csv_file)
 
-    # Create optimization parameters
-    params = OptimizationParams(
-        must_include_players=list(must_include_players or []),
-        only_use_players=list(only_use_players or []),
-        exclude_players=list(exclude_players or []),
-    )
+        # Read (CSV, Parquet or Arrow) and convert to Player objects with validation
+        try:
+            with _profile_phase(profiler, 'load_players'):
+                players = load_players(csv_path, use_cache=use_cache, slate_column=slate_column, columns=columns)
+        except FileNotFoundError:
+            print(f"Error: Input file '{csv_path}' not found.")
+            return
+        except ImportError as e:
+            print(f'Error reading {csv_path}: {e}')
+            return
+        except ValueError as e:
+            print(f'Error processing {csv_path}: {e}')
+            return
+
+        if not players:
+            print('Error: No valid players found in the data.')
+            return
+
+        # Create optimization parameters
+        params = OptimizationParams(
+            must_include_players=list(must_include_players or []),
+            only_use_players=list(only_use_players or []),
+            exclude_players=list(exclude_players or []),
+            max_players_per_team=max_players_per_team,
+            qb_stack=qb_stack,
+            bring_back=bring_back,
+            no_dst_vs_qb=no_dst_vs_qb,
+        )
 
-    # --- Player Filtering ---
-    if params.must_include_players:
-        print(f'Must-include players requested: {", ".join(params.must_include_players)}')
-    if params.only_use_players:
-        print(f'Only-use player pool requested: {", ".join(params.only_use_players)}')
-    if params.exclude_players:
-        print(f'Exclude players requested: {", ".join(params.exclude_players)}')
+        # --- Player Filtering ---
+        if params.must_include_players:
+            print(f'Must-include players requested: {", ".join(params.must_include_players)}')
+        if params.only_use_players:
+            print(f'Only-use player pool requested: {", ".join(params.only_use_players)}')
+        if params.exclude_players:
+            print(f'Exclude players requested: {", ".join(params.exclude_players)}')
 
-    all_lineups_results = []
-    for name, config in lineup_configs.items():
-        if name == 'two_te' and not allow_two_te:
+        configs = dict(lineup_configs if configs is None else configs)
+        if not allow_two_te:
             print('WARNING: Two TE lineup configuration disabled')
-            continue
-        lineups = calculate_lineups(config, name, players, params)
-        all_lineups_results.extend(lineups)
-
-    print('Lineup files created')
-
-    if not all_lineups_results:
-        print('No lineups were generated.')
-        return
-
-    # Convert to DataFrame for processing
-    lineup_dicts = [lineup.to_dict() for lineup in all_lineups_results]
-    combined_df = pd.DataFrame(lineup_dicts)
-
-    combined_df[TOTAL_SCORE] = pd.to_numeric(combined_df[TOTAL_SCORE])
-    combined_df = combined_df.sort_values(by=TOTAL_SCORE, ascending=False)
-    combined_df.to_csv(Path('combined_lineups.csv'), index=False, header=False)
+            configs.pop('two_te', None)
+
+        if slate_column:
+            generate_slate_lineup_files(
+                players,
+                configs,
+                params,
+                max_workers=max_workers,
+                max_lineups=max_lineups,
+                solution_pool=solution_pool,
+                output_dir=output_dir,
+                top_n=top_n,
+                time_budget=time_budget,
+            )
+            return
+
+        result = optimize_lineups(
+            players,
+            configs,
+            params,
+            max_lineups,
+            Path(output_dir),
+            top_n=top_n,
+            time_budget=time_budget,
+            solution_pool=solution_pool,
+            profiler=profiler,
+        )
 
-    # Limit to top 15 lineups for printing
-    combined_df_print = combined_df.head(15).copy()
+        print('Lineup files created')
 
-    # Truncate all string columns to 12 characters for printing
-    for col in combined_df_print.columns:
-        if pd.api.types.is_string_dtype(combined_df_print[col]) or combined_df_print[col].dtype == 'object':
-            combined_df_print.loc[:, col] = combined_df_print[col].astype(str).str[:12]
+        if time_budget is not None:
+            for row in result.status().itertuples(index=False):
+                print(f'{row.Config}: {row.Status} ({row.Lineups} lineups)')
 
-    print(combined_df_print.to_string(index=False, header=False))
+        if not any(result.lineups_by_config.values()):
+            print('No lineups were generated.')
+            return
+        print_lineups(list(itertools.islice(merge_lineups(result.lineups_by_config.values()), PRINTED_LINEUPS)))
 
 
 if __name__ == '__main__':
@@ -366,7 +1690,33 @@ if __name__ == '__main__':
 
     two_te_allowed = True
 
-    generate_lineup_files(file_name, must_include, only_use, exclude, allow_two_te=two_te_allowed)
+    # Reuse the parsed player pool from draftkings.csv.players.npy until the source file changes
+    use_player_cache = True
+
+    # Column holding the slate/game key when the file contains several slates (None = single slate)
+    slate_key = None
+
+    # Wall-clock budget in seconds before lock (None = run to completion)
+    lock_budget = None
+
+    # Lineups per config, and a SQLite file that keeps them so a later run asking for more resumes (None = off)
+    lineups_per_config = MAX_LINEUPS
+    pool_file = None
+    if pool_file:
+        from solution_pool import SolutionPool
+
+    generate_lineup_files(
+        file_name,
+        must_include,
+        only_use,
+        exclude,
+        allow_two_te=two_te_allowed,
+        use_cache=use_player_cache,
+        slate_column=slate_key,
+        time_budget=lock_budget,
+        max_lineups=lineups_per_config,
+        solution_pool=SolutionPool(pool_file) if pool_file else None,
+    )
     end_time = time.time()
 
     print(f'Total execution time: {end_time - start_time:.2f} seconds')
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import ast
+import linecache
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+from typing import Self
+
+import pandas as pd
+
+KIB = 1024
+
+# Allocations are attributed to the nearest function defined in a module of this directory
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# Frames from the profiler and the import system are left out of the allocation report
+_IGNORED_FILES = (
+    tracemalloc.__file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+)
+
+
+@cache
+def _functions(filename: str) -> tuple[tuple[int, int, str], ...]:
+    """(first line, last line, qualified name) of every function in a source file"""
+    try:
+        tree = ast.parse(''.join(linecache.getlines(filename)))
+    except SyntaxError, ValueError:
+        return ()
+
+    functions = []
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = f'{prefix}{child.name}'
+                if not isinstance(child, ast.ClassDef):
+                    functions.append((child.lineno, child.end_lineno or child.lineno, name))
+                visit(child, f'{name}.')
+            else:
+                visit(child, prefix)
+
+    visit(tree, '')
+    return tuple(functions)
+
+
+def function_at(filename: str, lineno: int) -> str:
+    """The innermost function containing a source line, or <module>"""
+    enclosing = [(first, name) for first, last, name in _functions(filename) if first <= lineno <= last]
+    return max(enclosing)[1] if enclosing else '<module>'
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots and peak memory per named phase
+
+    phase() records the traced memory when the phase ends, the peak reached while it ran and the lines whose
+    allocations grew the most between its start and end snapshots. Each line is attributed to the innermost
+    function of this project on its stack, searching at most the innermost `frames` frames of the traceback.
+    tracemalloc traces the whole process, so only one profiled run should be active at a time, and worker
+    processes are not traced.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 10):
+        self.top = top
+        self.frames = frames
+        self.phases: list[dict] = []
+        self.allocations: list[dict] = []
+        self._started = False
+
+    def __enter__(self) -> Self:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = self._snapshot()
+        start_current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            end = self._snapshot()
+            self.phases.append(
+                {
+                    'Phase': name,
+                    'Start KiB': round(start_current / KIB, 1),
+                    'End KiB': round(current / KIB, 1),
+                    'Peak KiB': round(peak / KIB, 1),
+                    'Retained KiB': round((current - start_current) / KIB, 1),
+                }
+            )
+            self.allocations.extend(self._top_sites(name, end.compare_to(start, 'traceback')))
+
+    def _top_sites(self, name: str, stats: list[tracemalloc.StatisticDiff]) -> list[dict]:
+        """Group the grown traces by allocating line and the nearest calling function of this project"""
+        project_files: dict[str, bool] = {}
+
+        def in_project(filename: str) -> bool:
+            if filename not in project_files:
+                project_files[filename] = Path(filename).parent == PROJECT_DIR
+            return project_files[filename]
+
+        sites: dict[tuple[str, int, tracemalloc.Frame | None], list[int]] = {}
+        for stat in stats:
+            site = stat.traceback[-1]
+            if stat.size_diff <= 0 or site.filename in _IGNORED_FILES:
+                continue
+            caller = next((frame for frame in reversed(stat.traceback) if in_project(frame.filename)), None)
+            totals = sites.setdefault((site.filename, site.lineno, caller), [0, 0])
+            totals[0] += stat.size_diff
+            totals[1] += stat.count_diff
+
+        top = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[: self.top]
+        return [
+            {
+                'Phase': name,
+                'Function': function_at(caller.filename, caller.lineno) if caller else '',
+                'File': filename,
+                'Line': lineno,
+                'Code': linecache.getline(filename, lineno).strip(),
+                'Size KiB': round(size / KIB, 1),
+                'Blocks': count,
+            }
+            for (filename, lineno, caller), (size, count) in top
+        ]
+
+    def phase_report(self) -> pd.DataFrame:
+        return pd.DataFrame(self.phases)
+
+    def allocation_report(self) -> pd.DataFrame:
+        """The top allocation sites of every phase, largest growth first within each phase"""
+        return pd.DataFrame(self.allocations)
+
+    def write(self, path: str | Path) -> tuple[Path, Path]:
+        """Write the phase report to path and the allocation report next to it as <stem>_allocations.csv"""
+        path = Path(path)
+        allocations_path = path.with_name(f'{path.stem}_allocations.csv')
+        self.phase_report().to_csv(path, index=False)
+        self.allocation_report().to_csv(allocations_path, index=False)
+        return path, allocations_path
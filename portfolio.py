@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from main import Lineup, read_lineups_csv
+
+WORD_BITS = 64
+
+# Set bits per byte, for NumPy builds without np.bitwise_count
+_BYTE_POPCOUNT = np.array([byte.bit_count() for byte in range(256)], dtype=np.uint8)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 word"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1)
+
+
+def lineup_bitsets(
+    lineups: Sequence[Lineup], player_index: dict[tuple[str, str], int] | None = None
+) -> tuple[np.ndarray, dict[tuple[str, str], int]]:
+    """Encode each lineup as a row of uint64 words with one bit per player, plus the (name, position) -> bit index
+
+    A given player_index is used as the starting bit assignment and extended with any new players, so lineups
+    from other sources can be encoded with the same bits.
+    """
+    player_index = {} if player_index is None else player_index
+    rows, bits = [], []
+    for row, lineup in enumerate(lineups):
+        for player in lineup.players:
+            rows.append(row)
+            bits.append(player_index.setdefault((player.name, player.position), len(player_index)))
+
+    words = max(1, -(-len(player_index) // WORD_BITS))
+    bitsets = np.zeros((len(lineups), words), dtype=np.uint64)
+    bits = np.asarray(bits, dtype=np.int64)
+    np.bitwise_or.at(
+        bitsets,
+        (np.asarray(rows, dtype=np.int64), bits // WORD_BITS),
+        np.left_shift(np.uint64(1), (bits % WORD_BITS).astype(np.uint64)),
+    )
+    return bitsets, player_index
+
+
+def overlaps_with(bitsets: np.ndarray, bitset: np.ndarray) -> np.ndarray:
+    """Players every lineup shares with one lineup's bitset"""
+    return _popcount(bitsets & bitset).sum(axis=1, dtype=np.int64)
+
+
+def select_portfolio(lineups: Sequence[Lineup], size: int, max_overlap: int) -> list[Lineup]:
+    """Greedily pick up to size lineups, best score first, sharing at most max_overlap players pairwise
+
+    Each pick updates every candidate's largest overlap with the portfolio in one vectorized pass, so the work is
+    size passes over the candidate bitsets and no lineup pairs are ever materialized.
+    """
+    if size <= 0 or not lineups:
+        return []
+
+    order = np.argsort([-lineup.total_score for lineup in lineups], kind='stable')
+    bitsets, _ = lineup_bitsets([lineups[i] for i in order])
+
+    worst_overlap = np.zeros(len(order), dtype=np.int64)
+    available = np.ones(len(order), dtype=bool)
+    picked = []
+    while len(picked) < size:
+        candidates = np.flatnonzero(available & (worst_overlap <= max_overlap))
+        if not len(candidates):
+            break
+        pick = candidates[0]
+        picked.append(pick)
+        available[pick] = False
+        np.maximum(worst_overlap, overlaps_with(bitsets, bitsets[pick]), out=worst_overlap)
+
+    return [lineups[order[i]] for i in picked]
+
+
+def select_portfolio_file(
+    lineup_file: str | Path, output_file: str | Path, size: int, max_overlap: int
+) -> list[Lineup]:
+    """Pick a portfolio from a lineup CSV such as combined_lineups.csv and write it in the same format"""
+    portfolio = select_portfolio(read_lineups_csv(lineup_file), size, max_overlap)
+    if len(portfolio) < size:
+        print(f'WARNING: Only {len(portfolio)} lineups share at most {max_overlap} players with each other')
+    pd.DataFrame([lineup.to_dict() for lineup in portfolio]).to_csv(output_file, index=False, header=False)
+    return portfolio
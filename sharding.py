@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+import pickle
+import socket
+import sys
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Protocol
+
+QUEUE_DIR = 'queue'
+CLAIMED_DIR = 'claimed'
+RESULTS_DIR = 'results'
+
+
+class ShardExecutor(Protocol):
+    """Runs fn over the zipped iterables and returns the results in input order"""
+
+    def map(self, fn: Callable[..., Any], *iterables: Iterable[Any]) -> list[Any]: ...
+
+
+class LocalProcessExecutor:
+    """Runs shards in a local process pool"""
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers
+
+    def map(self, fn: Callable[..., Any], *iterables: Iterable[Any]) -> list[Any]:
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fn, *iterables))
+
+
+class FileQueueExecutor:
+    """Runs shards through a work queue in a directory shared by several machines
+
+    Every task is pickled into the queue directory. Any machine that can import this project and sees the same
+    directory can help by running ``python sharding.py <directory>``. The submitting process also drains the
+    queue itself unless help_drain is False, and then waits for the remaining results. Only point this at a
+    directory that trusted machines can write to, because tasks and results are unpickled.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        help_drain: bool = True,
+        poll_interval: float = 0.5,
+        timeout: float | None = None,
+    ):
+        self.directory = Path(directory)
+        self.help_drain = help_drain
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def map(self, fn: Callable[..., Any], *iterables: Iterable[Any]) -> list[Any]:
+        queue_dir, _, results_dir = _queue_dirs(self.directory)
+
+        job_id = uuid.uuid4().hex
+        task_names = []
+        for index, args in enumerate(zip(*iterables)):
+            task_name = f'{job_id}_{index:06d}'
+            _atomic_write(queue_dir / f'{task_name}.task', (fn, args))
+            task_names.append(task_name)
+
+        if self.help_drain:
+            drain_work_queue(self.directory)
+
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        results = []
+        for task_name in task_names:
+            result_path = results_dir / f'{task_name}.result'
+            while not result_path.exists():
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f'Timed out waiting for shard {task_name} in {self.directory}')
+                time.sleep(self.poll_interval)
+
+            with result_path.open('rb') as f:
+                ok, result = pickle.load(f)
+            result_path.unlink()
+
+            if not ok:
+                raise RuntimeError(f'Shard {task_name} failed: {result}')
+            results.append(result)
+
+        return results
+
+
+def _queue_dirs(directory: Path) -> tuple[Path, Path, Path]:
+    dirs = (directory / QUEUE_DIR, directory / CLAIMED_DIR, directory / RESULTS_DIR)
+    for path in dirs:
+        path.mkdir(parents=True, exist_ok=True)
+    return dirs
+
+
+def _atomic_write(path: Path, obj: Any) -> None:
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with tmp_path.open('wb') as f:
+        pickle.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def drain_work_queue(directory: str | Path, wait: bool = False, poll_interval: float = 0.5) -> int:
+    """Claim and run queued tasks until the queue is empty (or forever when wait is True)
+
+    Tasks are claimed by renaming them into the claimed directory, which succeeds for exactly one worker.
+    Returns the number of tasks this worker ran.
+    """
+    queue_dir, claimed_dir, results_dir = _queue_dirs(Path(directory))
+    worker_id = f'{socket.gethostname()}-{os.getpid()}'
+    completed = 0
+
+    while True:
+        task_paths = sorted(queue_dir.glob('*.task'))
+        if not task_paths:
+            if not wait:
+                return completed
+            time.sleep(poll_interval)
+            continue
+
+        for task_path in task_paths:
+            claimed_path = claimed_dir / f'{task_path.stem}.{worker_id}'
+            try:
+                os.rename(task_path, claimed_path)
+            except OSError:
+                # Another worker claimed it first
+                continue
+
+            with claimed_path.open('rb') as f:
+                fn, args = pickle.load(f)
+
+            try:
+                outcome = (True, fn(*args))
+            except Exception as e:  # noqa: BLE001 - report any shard failure back to the submitter
+                outcome = (False, repr(e))
+
+            _atomic_write(results_dir / f'{task_path.stem}.result', outcome)
+            claimed_path.unlink()
+            completed += 1
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('Usage: python sharding.py <shared-queue-directory>')
+        sys.exit(1)
+
+    print(f'Draining work queue in {sys.argv[1]} (Ctrl+C to stop)')
+    drain_work_queue(sys.argv[1], wait=True)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+
+import pandas as pd
+from pulp import LpMaximize, LpProblem, LpStatusOptimal, LpVariable, lpSum
+from pydantic import BaseModel, Field
+
+from main import (
+    MAX_LINEUPS,
+    QB_POSITIONS,
+    Lineup,
+    LineupPlayer,
+    OptimizationParams,
+    Player,
+    TeamIndex,
+    _add_team_rules,
+    _solve,
+    _warn_ignored_team_rules,
+    filter_players,
+)
+
+CAPTAIN = 'CPT'
+FLEX = 'FLEX'
+
+# A lineup as (indexes of its players in the pool, index of its captain)
+ShowdownSelection = tuple[frozenset[int], int]
+
+
+class ShowdownConfig(BaseModel):
+    """Roster shape of a captain-mode contest: one captain plus flex slots open to any position"""
+
+    flex: int = Field(5, ge=1)
+    captain_multiplier: float = Field(1.5, ge=1)
+
+    # DraftKings requires players from both teams when the pool lists them
+    require_both_teams: bool = True
+
+    def total_players(self) -> int:
+        return self.flex + 1
+
+
+def _captain_salary(salary: int, config: ShowdownConfig) -> int:
+    return round(salary * config.captain_multiplier)
+
+
+def build_showdown_problem(
+    name: str,
+    players: Sequence[Player],
+    config: ShowdownConfig,
+    params: OptimizationParams,
+    previous_lineups: Sequence[ShowdownSelection] = (),
+) -> tuple[LpProblem, dict[int, LpVariable], dict[int, LpVariable]]:
+    """Build the captain-mode model over one variable pair per player
+
+    x_p says the player is in the lineup and c_p <= x_p says it is the captain, so the captain's extra salary
+    and points are just the c_p terms. The flex slots are never numbered, so the same roster cannot come back as
+    a reordering of its flex players, and the cut for a lineup (S, k) is sum(x_p for p in S) + c_k <= |S|. That
+    cut allows the same players under another captain.
+
+    The team rules of params are added to the x_p by the same helper calculate_lineups uses. A team's opponent
+    comes from the opponent column, or is the other team of a two-team pool.
+    """
+    prob = LpProblem(name, LpMaximize)
+    indexes = range(len(players))
+    in_lineup = LpVariable.dicts('x', indexes, cat='Binary')
+    captain = LpVariable.dicts('c', indexes, cat='Binary')
+    bonus = config.captain_multiplier - 1
+
+    prob += (
+        lpSum([p.projection * in_lineup[i] + bonus * p.projection * captain[i] for i, p in enumerate(players)]),
+        'Total_Points',
+    )
+    prob += (
+        lpSum(
+            [
+                p.salary * in_lineup[i] + (_captain_salary(p.salary, config) - p.salary) * captain[i]
+                for i, p in enumerate(players)
+            ]
+        )
+        <= params.salary_cap,
+        'Total_Salary',
+    )
+    prob += lpSum(in_lineup.values()) == config.total_players(), 'Total_Players'
+    prob += lpSum(captain.values()) == 1, 'Captain'
+    for i in indexes:
+        prob += captain[i] <= in_lineup[i], f'Captain_{i}_in_lineup'
+
+    for i, p in enumerate(players):
+        if p.name in params.must_include_players:
+            prob += in_lineup[i] == 1, f'must_include_{i}'
+
+    # The shared team rules address players as player_vars[position][key]; the pool index is the key
+    player_vars: dict[str, dict[str, LpVariable]] = {}
+    team_players: dict[str, list[tuple[str, str]]] = {}
+    for i, p in enumerate(players):
+        player_vars.setdefault(p.position, {})[str(i)] = in_lineup[i]
+        if p.team is not None:
+            team_players.setdefault(p.team, []).append((p.position, str(i)))
+
+    opponents = {p.team: p.opponent for p in players if p.team is not None and p.opponent is not None}
+    if len(team_players) == 2:
+        first, second = team_players
+        opponents = {first: second, second: first} | opponents
+    teams = TeamIndex(team_players, opponents)
+
+    if config.require_both_teams and len(teams.players) > 1:
+        for team, members in teams.players.items():
+            team_total = lpSum([player_vars[pos][key] for pos, key in members])
+            prob += team_total <= config.total_players() - 1, f'Team_{team}_not_all'
+
+    if params.max_players_per_team is not None or params.qb_stack or params.bring_back or params.no_dst_vs_qb:
+        max_qbs = min(config.total_players(), sum(p.position in QB_POSITIONS for p in players))
+        _add_team_rules(prob, player_vars, teams, max_qbs, params)
+
+    for cut, (selected, captain_index) in enumerate(previous_lineups):
+        _add_cut(prob, in_lineup, captain, selected, captain_index, cut)
+
+    return prob, in_lineup, captain
+
+
+def _add_cut(
+    prob: LpProblem,
+    in_lineup: dict[int, LpVariable],
+    captain: dict[int, LpVariable],
+    selected: frozenset[int],
+    captain_index: int,
+    cut: int,
+) -> None:
+    prob += (
+        lpSum([in_lineup[i] for i in selected]) + captain[captain_index] <= len(selected),
+        f'unique_lineup_{cut}',
+    )
+
+
+def _showdown_lineup(
+    lineup_num: int, players: Sequence[Player], selection: ShowdownSelection, config: ShowdownConfig
+) -> Lineup:
+    selected, captain_index = selection
+    captain = players[captain_index]
+    lineup_players = [
+        LineupPlayer(
+            position=CAPTAIN,
+            name=captain.name,
+            salary=_captain_salary(captain.salary, config),
+            projected_points=captain.projection * config.captain_multiplier,
+        )
+    ]
+    lineup_players += [
+        LineupPlayer(
+            position=FLEX, name=players[i].name, salary=players[i].salary, projected_points=players[i].projection
+        )
+        for i in sorted(selected - {captain_index})
+    ]
+    # The cap was already enforced by the model; the context only skips the default cap
+    return Lineup.model_validate(
+        {
+            'lineup_number': lineup_num,
+            'players': lineup_players,
+            'total_salary': sum(p.salary for p in lineup_players),
+            'total_score': sum(p.projected_points for p in lineup_players),
+        },
+        context={'salary_cap': None},
+    )
+
+
+def showdown_lineups(
+    players: Sequence[Player],
+    config: ShowdownConfig | None = None,
+    params: OptimizationParams | None = None,
+    max_lineups: int = MAX_LINEUPS,
+    output_file: str | Path | None = None,
+) -> list[Lineup]:
+    """The best captain-mode lineups in descending score order
+
+    The model is built once and every lineup found only adds its exclusion cut. The captain is the first player of
+    each lineup, listed as CPT with the multiplied salary and points, and the rest are listed as FLEX. With an
+    output_file the lineups are also written in the same layout as calculate_lineups.
+    """
+    config = config or ShowdownConfig()
+    params = params or OptimizationParams()
+    pool = filter_players(players, params)
+
+    teams = {p.team for p in pool if p.team is not None}
+    _warn_ignored_team_rules(pool, params, has_opponents=len(teams) == 2 or any(p.opponent for p in pool))
+
+    lineups: list[Lineup] = []
+    if len(pool) >= config.total_players():
+        prob, in_lineup, captain = build_showdown_problem('Showdown', pool, config, params)
+        for lineup_num in range(1, max_lineups + 1):
+            if _solve(prob) != LpStatusOptimal:
+                break
+            selected = frozenset(i for i, var in in_lineup.items() if var.varValue > 0.5)
+            captain_index = next(i for i, var in captain.items() if var.varValue > 0.5)
+            lineups.append(_showdown_lineup(lineup_num, pool, (selected, captain_index), config))
+            _add_cut(prob, in_lineup, captain, selected, captain_index, lineup_num - 1)
+    else:
+        print(f'WARNING: {len(pool)} eligible players cannot fill {config.total_players()} showdown slots')
+
+    if output_file is not None:
+        pd.DataFrame([lineup.to_dict() for lineup in lineups]).to_csv(output_file, index=False, header=False)
+    return lineups
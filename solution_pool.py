@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from main import Lineup, LineupConfig, LineupPlayer, OptimizationParams, PlayerData
+
+# Parameters that change the lineups enumerated from an already filtered player pool
+POOL_PARAM_FIELDS = (
+    'salary_cap',
+    'must_include_players',
+    'min_score',
+    'max_gap_from_optimal',
+    'max_players_per_team',
+    'qb_stack',
+    'bring_back',
+    'no_dst_vs_qb',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    slate_hash TEXT NOT NULL,
+    config_key TEXT NOT NULL,
+    params_key TEXT NOT NULL,
+    exhausted INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (slate_hash, config_key, params_key)
+);
+CREATE TABLE IF NOT EXISTS cuts (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    cut_number INTEGER NOT NULL,
+    position TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cuts_run ON cuts (run_id, cut_number);
+CREATE TABLE IF NOT EXISTS lineups (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    lineup_number INTEGER NOT NULL,
+    total_salary INTEGER NOT NULL,
+    total_score REAL NOT NULL,
+    PRIMARY KEY (run_id, lineup_number)
+);
+CREATE TABLE IF NOT EXISTS lineup_players (
+    run_id INTEGER NOT NULL,
+    lineup_number INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    position TEXT NOT NULL,
+    name TEXT NOT NULL,
+    salary INTEGER NOT NULL,
+    projection REAL NOT NULL,
+    PRIMARY KEY (run_id, lineup_number, slot)
+);
+CREATE INDEX IF NOT EXISTS lineup_players_name ON lineup_players (name);
+"""
+
+PoolKey = tuple[str, str, str]
+
+
+class StoredRun(BaseModel):
+    """What an earlier enumeration of the same slate, config and params already found"""
+
+    cuts: list[list[tuple[str, str]]] = []
+    lineups: list[Lineup] = []
+    exhausted: bool = False
+
+
+def _digest(obj: object) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+
+
+def pool_key(player_data: PlayerData, lineup_config: LineupConfig, params: OptimizationParams) -> PoolKey:
+    """(slate hash, config key, params key) for a filtered player pool"""
+    slate = sorted((pos, name, *entry) for pos, players in player_data.items() for name, entry in players.items())
+    return (
+        _digest(slate),
+        _digest(lineup_config.model_dump(by_alias=True)),
+        _digest(params.model_dump(include=set(POOL_PARAM_FIELDS))),
+    )
+
+
+class SolutionPool:
+    """Lineups and exclusion cuts from earlier runs, kept in a SQLite file so enumeration can resume
+
+    Each (slate, config, params) run stores every cut applied in order and the lineups they produced. A later run
+    that wants more lineups rebuilds the model with the stored cuts and starts at the next lineup. The pool opens
+    a connection per call, so it can be shared with worker processes.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _run_id(conn: sqlite3.Connection, key: PoolKey) -> int | None:
+        row = conn.execute(
+            'SELECT run_id FROM runs WHERE slate_hash = ? AND config_key = ? AND params_key = ?', key
+        ).fetchone()
+        return None if row is None else row[0]
+
+    @staticmethod
+    def _read_lineups(conn: sqlite3.Connection, rows: Sequence[tuple[int, int, int, float]]) -> list[Lineup]:
+        lineups = []
+        for run_id, lineup_number, total_salary, total_score in rows:
+            players = conn.execute(
+                'SELECT position, name, salary, projection FROM lineup_players '
+                'WHERE run_id = ? AND lineup_number = ? ORDER BY slot',
+                (run_id, lineup_number),
+            ).fetchall()
+            # Stored lineups were checked against their run's salary cap when they were found
+            lineups.append(
+                Lineup.model_validate(
+                    {
+                        'lineup_number': lineup_number,
+                        'players': [
+                            LineupPlayer(position=pos, name=name, salary=salary, projected_points=proj)
+                            for pos, name, salary, proj in players
+                        ],
+                        'total_salary': total_salary,
+                        'total_score': total_score,
+                    },
+                    context={'salary_cap': None},
+                )
+            )
+        return lineups
+
+    def load(
+        self,
+        player_data: PlayerData,
+        lineup_config: LineupConfig,
+        params: OptimizationParams,
+    ) -> StoredRun:
+        """The cuts and lineups stored for this run (empty when it was never started)"""
+        key = pool_key(player_data, lineup_config, params)
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT run_id, exhausted FROM runs WHERE slate_hash = ? AND config_key = ? AND params_key = ?', key
+            ).fetchone()
+            if row is None:
+                return StoredRun()
+            run_id, exhausted = row
+
+            cuts: dict[int, list[tuple[str, str]]] = {}
+            for cut_number, pos, name in conn.execute(
+                'SELECT cut_number, position, name FROM cuts WHERE run_id = ? ORDER BY cut_number, rowid', (run_id,)
+            ):
+                cuts.setdefault(cut_number, []).append((pos, name))
+
+            rows = conn.execute(
+                'SELECT run_id, lineup_number, total_salary, total_score FROM lineups '
+                'WHERE run_id = ? ORDER BY lineup_number',
+                (run_id,),
+            ).fetchall()
+            return StoredRun(cuts=list(cuts.values()), lineups=self._read_lineups(conn, rows), exhausted=exhausted)
+
+    def save(
+        self,
+        player_data: PlayerData,
+        lineup_config: LineupConfig,
+        params: OptimizationParams,
+        cuts: Sequence[Sequence[tuple[str, str]]],
+        lineups: Sequence[Lineup],
+        exhausted: bool = False,
+    ) -> None:
+        """Store the full cut sequence and lineups of this run; rows already stored are kept"""
+        key = pool_key(player_data, lineup_config, params)
+        with self._connect() as conn:
+            conn.execute('INSERT OR IGNORE INTO runs (slate_hash, config_key, params_key) VALUES (?, ?, ?)', key)
+            run_id = self._run_id(conn, key)
+
+            stored_cuts = conn.execute(
+                'SELECT COUNT(DISTINCT cut_number) FROM cuts WHERE run_id = ?', (run_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                'INSERT INTO cuts (run_id, cut_number, position, name) VALUES (?, ?, ?, ?)',
+                [
+                    (run_id, cut_number, pos, name)
+                    for cut_number, cut in enumerate(cuts[stored_cuts:], start=stored_cuts)
+                    for pos, name in cut
+                ],
+            )
+
+            for lineup in lineups:
+                inserted = conn.execute(
+                    'INSERT OR IGNORE INTO lineups (run_id, lineup_number, total_salary, total_score) '
+                    'VALUES (?, ?, ?, ?)',
+                    (run_id, lineup.lineup_number, lineup.total_salary, lineup.total_score),
+                )
+                if inserted.rowcount:
+                    conn.executemany(
+                        'INSERT INTO lineup_players (run_id, lineup_number, slot, position, name, salary, projection) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        [
+                            (run_id, lineup.lineup_number, slot, p.position, p.name, p.salary, p.projected_points)
+                            for slot, p in enumerate(lineup.players)
+                        ],
+                    )
+
+            if exhausted:
+                conn.execute('UPDATE runs SET exhausted = 1 WHERE run_id = ?', (run_id,))
+
+    def lineups_with_player(self, name: str) -> list[Lineup]:
+        """Every stored lineup containing the player, best score first, read from the index without solving"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT l.run_id, l.lineup_number, l.total_salary, l.total_score FROM lineups l '
+                'JOIN lineup_players p ON p.run_id = l.run_id AND p.lineup_number = l.lineup_number '
+                'WHERE p.name = ? ORDER BY l.total_score DESC',
+                (name,),
+            ).fetchall()
+            return self._read_lineups(conn, rows)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from blend import blend_projections, blend_sweep, blend_sweep_file, blend_weights, load_projection_sources
+from main import LineupConfig, OptimizationParams, Player, optimize_lineups
+
+SOURCES = ('Proj A', 'Proj B', 'Proj C')
+CONFIG = {'four_wr': LineupConfig(QB=1, RB=2, WR=4, TE=1, DST=1)}
+
+
+@pytest.fixture
+def slate_file(tmp_path):
+    rng = np.random.default_rng(3)
+    rows = []
+    for pos, count in {'QB': 4, 'RB': 8, 'WR': 12, 'TE': 4, 'DST': 4}.items():
+        for i in range(count):
+            salary = int(rng.integers(30, 90)) * 100
+            rows.append(
+                {
+                    'Player': f'{pos} {i}',
+                    'DK Pos': pos,
+                    'DK Salary': salary,
+                    **{source: round(salary / 1000 * rng.uniform(1.5, 3.5), 1) for source in SOURCES},
+                }
+            )
+    path = tmp_path / 'slate.csv'
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_blend_weights_and_projections():
+    """Test that the weight grid covers the simplex and blending is a weighted sum per player"""
+    weights = blend_weights(3, 5)
+    assert weights.shape == (21, 3)
+    assert np.allclose(weights.sum(axis=1), 1)
+    assert len({tuple(row) for row in weights.tolist()}) == 21
+
+    projections = np.array([[10.0, 20.0, 30.0], [1.0, 2.0, 3.0]])
+    blended = blend_projections(projections, np.array([[1, 0, 0], [0.5, 0.5, 0], [0.2, 0.3, 0.5]]))
+    assert np.allclose(blended, [[10, 15, 23], [1, 1.5, 2.3]])
+
+    with pytest.raises(ValueError):
+        blend_projections(projections, np.ones((1, 2)))
+
+
+def test_blend_sweep_matches_single_source_runs(slate_file, tmp_path):
+    """Test that each blend's lineups match a normal run on the blended projections, with cuts reset per blend"""
+    players, projections = load_projection_sources(slate_file, SOURCES)
+    assert projections.shape == (len(players), 3)
+    assert [p.projection for p in players] == projections[:, 0].tolist()
+
+    weights = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.2, 0.3, 0.5]])
+    report = blend_sweep(players, projections, SOURCES, weights, CONFIG, max_lineups=3, max_workers=2)
+    assert len(report) == 9
+
+    blended = blend_projections(projections, weights)
+    for blend in range(3):
+        blend_players = [
+            Player.model_construct(**{**p.model_dump(), 'projection': float(projection)})
+            for p, projection in zip(players, blended[:, blend])
+        ]
+        expected = optimize_lineups(blend_players, CONFIG, OptimizationParams(), max_lineups=3).combined()
+        rows = report[report['Blend'] == blend + 1]
+        assert rows['Blend Score'].tolist() == pytest.approx([round(lineup.total_score, 2) for lineup in expected])
+
+    pure_c = report[(report['Blend'] == 2) & (report['Lineup'] == 1)].iloc[0]
+    assert pure_c['Proj C Score'] == pytest.approx(pure_c['Blend Score'])
+
+    written = blend_sweep_file(slate_file, SOURCES, tmp_path / 'blends.csv', steps=2, configs=CONFIG)
+    assert written['Blend'].nunique() == 6
+    assert len(pd.read_csv(tmp_path / 'blends.csv')) == 6
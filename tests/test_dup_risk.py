@@ -0,0 +1,161 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dup_risk import expected_duplicates, rank_by_dup_risk, rank_by_dup_risk_file, simulate_field
+from main import Lineup, LineupConfig, LineupPlayer, Player, PlayerColumns, load_players
+
+CONFIGS = {'four_wr': LineupConfig(QB=1, RB=2, WR=4, TE=1, DST=1)}
+
+
+def make_pool(seed: int, per_position: int = 12) -> list[Player]:
+    rng = np.random.default_rng(seed)
+    players = []
+    for pos in ('QB', 'RB', 'WR', 'TE', 'DST'):
+        ownership = np.sort(rng.dirichlet(np.full(per_position, 0.4)))[::-1] * 100
+        for i in range(per_position):
+            players.append(
+                Player(
+                    name=f'{pos} {i}',
+                    position=pos,
+                    salary=int(rng.integers(20, 60)) * 100,
+                    projection=round(5 + float(ownership[i]) / 2, 1),
+                    ownership=round(float(ownership[i]), 2),
+                )
+            )
+    return players
+
+
+def make_lineup(number: int, players: list[Player]) -> Lineup:
+    lineup_players = [
+        LineupPlayer(position=p.position, name=p.name, salary=p.salary, projected_points=p.projection) for p in players
+    ]
+    return Lineup(
+        lineup_number=number,
+        players=lineup_players,
+        total_salary=sum(p.salary for p in players),
+        total_score=sum(p.projection for p in players),
+    )
+
+
+def roster(pool: list[Player], picks: dict[str, list[int]]) -> list[Player]:
+    return [next(p for p in pool if p.name == f'{pos} {i}') for pos, indexes in picks.items() for i in indexes]
+
+
+def test_simulated_field_follows_ownership():
+    """Test that field rosters fit the config and the cap and use players about as often as they are owned"""
+    pool = make_pool(seed=1)
+    field = simulate_field(pool, CONFIGS, entries=20_000, salary_cap=50_000, seed=3)
+    rosters = field[0]
+    assert rosters.shape == (20_000, 9)
+
+    positions = np.array([p.position for p in pool])[rosters]
+    assert (positions == 'WR').sum(axis=1).tolist() == [4] * 20_000
+    assert all(len(set(row)) == 9 for row in rosters[:500].tolist())
+    assert (np.array([p.salary for p in pool])[rosters].sum(axis=1) <= 50_000).all()
+
+    # Without a binding cap the QB slot is drawn in proportion to ownership
+    qb_rows = rosters[positions == 'QB']
+    usage = np.bincount(qb_rows, minlength=len(pool))[:12] / len(qb_rows)
+    ownership = np.array([p.ownership for p in pool[:12]])
+    assert usage == pytest.approx(ownership / ownership.sum(), abs=0.02)
+
+
+def test_simulated_field_with_fewer_entries_than_configs():
+    """Test that configs left without entries get an empty array instead of failing"""
+    configs = CONFIGS | {
+        'three_rb': LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1),
+        'two_te': LineupConfig(QB=1, RB=2, WR=3, TE=2, DST=1),
+    }
+    field = simulate_field(make_pool(seed=1), configs, entries=2, salary_cap=50_000, seed=3)
+    assert [rosters.shape for rosters in field] == [(1, 9), (1, 9), (0, 9)]
+
+
+def test_expected_duplicates_and_ranking(tmp_path):
+    """Test that chalky lineups are expected to be duplicated and drop in the penalized ranking"""
+    pool = make_pool(seed=2)
+    chalk = make_lineup(1, roster(pool, {'QB': [0], 'RB': [0, 1], 'WR': [0, 1, 2, 3], 'TE': [0], 'DST': [0]}))
+    contrarian = make_lineup(
+        2, roster(pool, {'QB': [11], 'RB': [10, 11], 'WR': [8, 9, 10, 11], 'TE': [11], 'DST': [11]})
+    )
+    lineups = [contrarian, chalk]
+
+    duplicates = expected_duplicates(lineups, pool, CONFIGS, salary_cap=100_000, seed=5)
+    assert duplicates[0] == 0
+    assert duplicates[1] > 1
+    assert expected_duplicates(lineups, pool, CONFIGS, field_size=200_000, salary_cap=100_000, seed=5)[1] == (
+        pytest.approx(2 * duplicates[1])
+    )
+
+    # Projections follow ownership, so the chalk lineup only drops once duplicates are penalized
+    assert chalk.total_score > contrarian.total_score
+    unpenalized = rank_by_dup_risk(lineups, pool, penalty=0.0, configs=CONFIGS, salary_cap=100_000, seed=5)
+    assert unpenalized['Lineup'].tolist() == [1, 2]
+    report = rank_by_dup_risk(lineups, pool, penalty=100.0, configs=CONFIGS, salary_cap=100_000, seed=5)
+    assert report['Lineup'].tolist() == [2, 1]
+    assert report['Adjusted Score'].iloc[1] == pytest.approx(chalk.total_score - 100 * duplicates[1], abs=0.01)
+
+    lineup_file = tmp_path / 'combined_lineups.csv'
+    pd.DataFrame([lineup.to_dict() for lineup in [chalk, contrarian]]).to_csv(lineup_file, index=False, header=False)
+    rank_by_dup_risk_file(
+        lineup_file, pool, tmp_path / 'ranked.csv', penalty=100.0, configs=CONFIGS, salary_cap=100_000
+    )
+    assert pd.read_csv(tmp_path / 'ranked.csv', header=None)[0].tolist() == [2, 1]
+    assert len(pd.read_csv(tmp_path / 'ranked_dup_risk.csv')) == 2
+
+
+def test_expected_duplicates_keys_players_by_position():
+    """Test that same-named players at different positions are different players in the field"""
+    renamed = {'WR 0': 'Twin', 'TE 11': 'Twin', 'TE 0': 'Other', 'WR 11': 'Other'}
+    pool = [p.model_copy(update={'name': renamed.get(p.name, p.name)}) for p in make_pool(seed=2)]
+    by_key = {(p.position, p.name): p for p in pool}
+    base = [by_key[key] for key in (('QB', 'QB 0'), ('RB', 'RB 0'), ('RB', 'RB 1'), ('DST', 'DST 0'))]
+    base += [by_key[('WR', f'WR {i}')] for i in (1, 2, 3)]
+    chalk = make_lineup(1, [*base, by_key[('WR', 'Twin')], by_key[('TE', 'Other')]])
+    swapped = make_lineup(2, [*base, by_key[('WR', 'Other')], by_key[('TE', 'Twin')]])
+    assert {p.name for p in chalk.players} == {p.name for p in swapped.players}
+
+    duplicates = expected_duplicates([chalk, swapped], pool, CONFIGS, salary_cap=100_000, seed=5)
+    assert duplicates[0] > 1
+    assert duplicates[1] == 0
+
+
+def test_dup_risk_scale():
+    """Test that 1,000 lineups are scored against a 100k-entry field in seconds"""
+    pool = make_pool(seed=4, per_position=30)
+    rng = np.random.default_rng(9)
+    by_position = {pos: [p for p in pool if p.position == pos] for pos in ('QB', 'RB', 'WR', 'TE', 'DST')}
+    counts = {'QB': 1, 'RB': 2, 'WR': 4, 'TE': 1, 'DST': 1}
+    lineups = [
+        make_lineup(i + 1, [p for pos, k in counts.items() for p in rng.choice(by_position[pos], k, replace=False)])
+        for i in range(1000)
+    ]
+
+    start = time.perf_counter()
+    duplicates = expected_duplicates(lineups, pool, CONFIGS, entries=100_000, salary_cap=100_000)
+    assert time.perf_counter() - start < 20
+    assert duplicates.shape == (1000,)
+    assert (duplicates >= 0).all()
+
+
+def test_ownership_column(tmp_path):
+    """Test that the optional ownership column is read, accepts percent signs and survives the player cache"""
+    slate_file = tmp_path / 'slate.csv'
+    pd.DataFrame(
+        {
+            'Player': ['A', 'B', 'C'],
+            'DK Pos': ['QB', 'RB', 'WR'],
+            'DK Salary': [6000, 5000, 4000],
+            'DK Proj': [20.0, 15.0, 10.0],
+            'Own': ['12.5%', '3', None],
+        }
+    ).to_csv(slate_file, index=False)
+    columns = PlayerColumns(ownership='Own')
+
+    players = load_players(slate_file, use_cache=True, columns=columns)
+    assert [p.ownership for p in players] == [12.5, 3.0, None]
+    assert [p.ownership for p in load_players(slate_file, use_cache=True, columns=columns)] == [12.5, 3.0, None]
+    assert [p.ownership for p in load_players(slate_file)] == [None, None, None]
+    assert [p.ownership for p in load_players(slate_file, use_cache=True)] == [None, None, None]
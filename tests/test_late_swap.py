@@ -0,0 +1,133 @@
+from collections import Counter
+
+import pytest
+
+from late_swap import late_swap, late_swap_file
+from main import (
+    SALARY_CAP,
+    Lineup,
+    LineupConfig,
+    LineupPlayer,
+    OptimizationParams,
+    Player,
+    calculate_lineups,
+    load_players,
+    read_lineups_csv,
+)
+
+
+@pytest.fixture(scope='module')
+def lineup_file(tmp_path_factory):
+    output_file = tmp_path_factory.mktemp('late_swap') / 'three_rb'
+    calculate_lineups(
+        LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1),
+        str(output_file),
+        load_players('./tests/draftkings.csv'),
+        OptimizationParams(),
+    )
+    return output_file.with_suffix('.csv')
+
+
+def test_read_lineups_csv_round_trip(lineup_file):
+    """Test that lineup files can be read back into Lineup models"""
+    lineups = read_lineups_csv(lineup_file)
+
+    assert len(lineups) == 10
+    assert [lineup.lineup_number for lineup in lineups] == list(range(1, 11))
+    assert all(len(lineup.players) == 9 for lineup in lineups)
+
+
+def test_late_swap_keeps_locks(lineup_file, tmp_path):
+    """Test that locked players stay put, unlocked slots are re-optimized and roster shape is preserved"""
+    lineups = read_lineups_csv(lineup_file)
+    players = load_players('./tests/draftkings.csv')
+
+    # QBs and DSTs have kicked off; one unlocked receiver got a big projection bump
+    locked = {p.name for p in players if p.position in {'QB', 'DST'}}
+    players = [p.model_copy(update={'projection': 40.0}) if p.name == 'Jakobi Meyers' else p for p in players]
+
+    swapped = late_swap_file(lineup_file, players, locked, tmp_path / 'swapped.csv', max_workers=2)
+
+    assert len(swapped) == len(lineups)
+    assert [lineup.players for lineup in read_lineups_csv(tmp_path / 'swapped.csv')] == [
+        lineup.players for lineup in swapped
+    ]
+    for before, after in zip(lineups, swapped):
+        assert [p.position for p in after.players] == [p.position for p in before.players]
+        assert {p.name for p in before.players if p.name in locked} == {
+            p.name for p in after.players if p.name in locked
+        }
+        assert after.total_salary <= SALARY_CAP
+        assert len({p.name for p in after.players}) == len(after.players)
+        assert any(p.name == 'Jakobi Meyers' for p in after.players)
+
+
+def test_late_swap_locked_players_not_added():
+    """Test that players locked outside a lineup cannot be swapped in"""
+    players = load_players('./tests/draftkings.csv')
+    roster = [
+        'Lamar Jackson',
+        'Kyren Williams',
+        'Austin Powers',
+        'Chase from Paw Patrol',
+        'Chris Olave',
+        'Drake London',
+        'Cedric Tillman',
+        'Mike Gesicki',
+        'Titans',
+    ]
+    by_name = {p.name: p for p in players}
+    lineup_players = [
+        LineupPlayer(
+            position=by_name[name].position,
+            name=name,
+            salary=by_name[name].salary,
+            projected_points=by_name[name].projection,
+        )
+        for name in roster
+    ]
+    lineup = Lineup(
+        lineup_number=1,
+        players=lineup_players,
+        total_salary=sum(p.salary for p in lineup_players),
+        total_score=sum(p.projected_points for p in lineup_players),
+    )
+    locked = {'Lamar Jackson', 'Titans', "Ja'Marr Chase", 'CeeDee Lamb'}
+
+    (swapped,) = late_swap([lineup], players, locked, max_workers=1)
+
+    names = Counter(p.name for p in swapped.players)
+    assert names['Lamar Jackson'] == 1
+    assert names['Titans'] == 1
+    assert "Ja'Marr Chase" not in names
+    assert 'CeeDee Lamb' not in names
+    assert swapped.total_score >= lineup.total_score
+
+
+def test_late_swap_keeps_team_cap():
+    """Test that a swap respects the team cap across the locked and swapped-in players"""
+    players = [
+        Player(name='A QB', position='QB', salary=6000, projection=20.0, team='A'),
+        Player(name='A WR1', position='WR', salary=5000, projection=15.0, team='A'),
+        Player(name='A WR2', position='WR', salary=5000, projection=30.0, team='A'),
+        Player(name='B WR1', position='WR', salary=5000, projection=10.0, team='B'),
+        Player(name='B WR2', position='WR', salary=5000, projection=12.0, team='B'),
+    ]
+    lineup_players = [
+        LineupPlayer(position=p.position, name=p.name, salary=p.salary, projected_points=p.projection)
+        for p in players
+        if p.name in {'A QB', 'A WR1', 'B WR1'}
+    ]
+    lineup = Lineup(
+        lineup_number=1,
+        players=lineup_players,
+        total_salary=sum(p.salary for p in lineup_players),
+        total_score=sum(p.projected_points for p in lineup_players),
+    )
+    locked = {'A QB', 'A WR1'}
+
+    (uncapped,) = late_swap([lineup], players, locked, max_workers=1)
+    assert 'A WR2' in {p.name for p in uncapped.players}
+
+    (capped,) = late_swap([lineup], players, locked, OptimizationParams(max_players_per_team=2), max_workers=1)
+    assert {p.name for p in capped.players} == {'A QB', 'A WR1', 'B WR2'}
@@ -0,0 +1,94 @@
+"""Performance regression tier, run with pytest -m perf
+
+Each synthetic slate is generated from a fixed seed and run through load_players, calculate_lineups for every
+config and generate_lineup_files with and without top_n. Phase timings and cbc solve counts are compared with
+perf_baseline.json.
+Set PERF_UPDATE_BASELINE=1 to rewrite the baseline from the current run instead.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import solver
+from main import OptimizationParams, calculate_lineups, generate_lineup_files, lineup_configs, load_players
+
+BASELINE_FILE = Path(__file__).with_name('perf_baseline.json')
+BASELINE = json.loads(BASELINE_FILE.read_text())
+
+pytestmark = pytest.mark.perf
+
+
+def write_slate(path: Path, seed: int, games: int) -> None:
+    """A DraftKings-format slate with every position on both teams of each game"""
+    rng = np.random.default_rng(seed)
+    per_team = {'QB': 2, 'RB': 4, 'WR': 6, 'TE': 3, 'DST': 1}
+    rows = []
+    for team in range(2 * games):
+        for pos, count in per_team.items():
+            for i in range(count):
+                salary = int(rng.integers(25, 95)) * 100
+                rows.append(
+                    {
+                        'Player': f'T{team} {pos}{i}',
+                        'DK Pos': pos,
+                        'DK Salary': f'${salary:,}',
+                        'DK Proj': round(salary / 1000 * rng.uniform(1.5, 3.5), 1),
+                    }
+                )
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+class PhaseTimer:
+    """Wall time and cbc solve count of each named phase"""
+
+    def __init__(self):
+        self.session = solver.get_solver_session()
+        self.phases: dict[str, dict[str, float]] = {}
+
+    def run(self, phase: str, func, *args, **kwargs):
+        solves = self.session.stats.solves
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.phases[phase] = {
+            'seconds': round(time.perf_counter() - start, 3),
+            'solves': self.session.stats.solves - solves,
+        }
+        return result
+
+
+@pytest.mark.parametrize('slate', sorted(BASELINE['slates']))
+def test_perf_against_baseline(slate, tmp_path, monkeypatch):
+    """Test that no phase is much slower or solves more often than the committed baseline"""
+    spec = BASELINE['slates'][slate]
+    slate_file = tmp_path / 'slate.csv'
+    write_slate(slate_file, spec['seed'], spec['games'])
+    monkeypatch.chdir(tmp_path)
+
+    timer = PhaseTimer()
+    players = timer.run('load_players', load_players, slate_file)
+    for name, config in lineup_configs.items():
+        timer.run(f'calculate_lineups.{name}', calculate_lineups, config, name, players, OptimizationParams())
+    timer.run('generate_lineup_files', generate_lineup_files, slate_file)
+    timer.run('generate_lineup_files.top_n', generate_lineup_files, slate_file, top_n=15)
+
+    if os.environ.get('PERF_UPDATE_BASELINE'):
+        BASELINE['slates'][slate]['phases'] = timer.phases
+        BASELINE_FILE.write_text(json.dumps(BASELINE, indent=2) + '\n')
+        pytest.skip(f'Baseline for {slate} updated')
+
+    tolerance = BASELINE['tolerance']
+    failures = []
+    for phase, expected in spec['phases'].items():
+        measured = timer.phases[phase]
+        allowed = expected['seconds'] * tolerance['time_ratio'] + tolerance['time_slack_seconds']
+        if measured['seconds'] > allowed:
+            failures.append(f'{phase}: {measured["seconds"]:.3f}s, baseline {expected["seconds"]:.3f}s')
+        if abs(measured['solves'] - expected['solves']) > tolerance['solve_count_delta']:
+            failures.append(f'{phase}: {measured["solves"]} solves, baseline {expected["solves"]}')
+    assert not failures, '\n'.join(failures)
@@ -0,0 +1,57 @@
+import importlib.util
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import playoff
+from main import read_lineups_csv
+
+ROOT = Path(__file__).resolve().parent.parent
+ROSTER = {'QB': 2, 'RB': 4, 'WR': 4, 'TE': 2, 'K': 1, 'DST': 1}
+
+
+@pytest.fixture
+def playoff_csv(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    rows = []
+    for team in [f'T{t:02d}' for t in range(16)]:
+        for pos, count in {'QB': 1, 'RB': 2, 'WR': 3, 'TE': 1, 'K': 1, 'DST': 1}.items():
+            for i in range(count):
+                rows.append(
+                    {'Player': f'{team} {pos}{i}', 'Team': team, 'Pos': pos, 'Total Points': rng.uniform(5, 30)}
+                )
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame(rows).to_csv('playoff.csv', index=False)
+    return pd.DataFrame(rows).set_index('Player')
+
+
+def test_playoff_lineups(playoff_csv):
+    """Test that the playoff script runs on the shared core without salaries"""
+    playoff.generate_lineup_files('playoff.csv', exclude_players=['T00 QB0'])
+
+    lineups = read_lineups_csv('playoff-league.csv')
+    assert len(lineups) == 10
+    assert len(read_lineups_csv('combined_lineups.csv')) == 10
+    for lineup in lineups:
+        assert Counter(p.position for p in lineup.players) == ROSTER
+        assert lineup.total_salary == 0
+        assert 'T00 QB0' not in {p.name for p in lineup.players}
+
+
+def test_playoff_one_per_team_lineups(playoff_csv):
+    """Test that the one-per-team script never takes two players from a team"""
+    spec = importlib.util.spec_from_file_location('playoff_one_per_team', ROOT / 'playoff-one-per-team.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    module.generate_lineup_files('playoff.csv', max_lineups=3)
+
+    lineups = read_lineups_csv('playoff-league.csv')
+    assert len(lineups) == 3
+    for lineup in lineups:
+        teams = [playoff_csv.loc[p.name, 'Team'] for p in lineup.players]
+        assert len(set(teams)) == len(teams)
+        assert Counter(p.position for p in lineup.players) == ROSTER
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from main import Lineup, LineupPlayer
+from portfolio import lineup_bitsets, overlaps_with, select_portfolio, select_portfolio_file
+
+
+def make_lineup(number: int, names: list[str], score: float) -> Lineup:
+    players = [LineupPlayer(position='WR', name=name, salary=5000, projected_points=1.0) for name in names]
+    return Lineup(lineup_number=number, players=players, total_salary=5000 * len(players), total_score=score)
+
+
+def test_overlaps_match_set_intersections():
+    """Test that the bitset overlaps count shared players, including across word boundaries"""
+    rng = np.random.default_rng(7)
+    names = [f'Player {i}' for i in range(150)]
+    lineups = [make_lineup(i + 1, list(rng.choice(names, size=9, replace=False)), 100.0) for i in range(50)]
+
+    bitsets, player_index = lineup_bitsets(lineups)
+    assert bitsets.dtype == np.uint64
+    assert bitsets.shape == (50, -(-len(player_index) // 64))
+
+    for i in (0, 17, 49):
+        expected = [len({p.name for p in lineups[i].players} & {p.name for p in other.players}) for other in lineups]
+        assert overlaps_with(bitsets, bitsets[i]).tolist() == expected
+
+
+def test_select_portfolio_respects_max_overlap():
+    """Test that the greedy pick takes the best lineup that fits the overlap rule"""
+    lineups = [
+        make_lineup(1, ['A', 'B', 'C', 'D'], 100),
+        make_lineup(2, ['A', 'B', 'C', 'E'], 99),
+        make_lineup(3, ['A', 'F', 'G', 'H'], 98),
+        make_lineup(4, ['B', 'F', 'I', 'J'], 97),
+        make_lineup(5, ['K', 'L', 'M', 'N'], 90),
+    ]
+
+    assert [lineup.lineup_number for lineup in select_portfolio(lineups, 3, 1)] == [1, 3, 4]
+    assert [lineup.lineup_number for lineup in select_portfolio(lineups, 3, 0)] == [1, 5]
+    assert [lineup.lineup_number for lineup in select_portfolio(lineups[::-1], 2, 4)] == [1, 2]
+
+
+def test_select_portfolio_large_pool(tmp_path):
+    """Test that a 20k lineup pool is handled quickly and every picked pair obeys the rule"""
+    rng = np.random.default_rng(0)
+    names = [f'Player {i}' for i in range(300)]
+    scores = np.sort(rng.uniform(100, 150, size=20_000))[::-1]
+    lineups = [
+        make_lineup(i + 1, list(rng.choice(names, size=9, replace=False)), float(score))
+        for i, score in enumerate(scores)
+    ]
+    lineup_file = tmp_path / 'combined_lineups.csv'
+    pd.DataFrame([lineup.to_dict() for lineup in lineups]).to_csv(lineup_file, index=False, header=False)
+
+    start = time.perf_counter()
+    portfolio = select_portfolio_file(lineup_file, tmp_path / 'portfolio.csv', size=150, max_overlap=2)
+    assert time.perf_counter() - start < 30
+
+    assert len(portfolio) == 150
+    bitsets, _ = lineup_bitsets(portfolio)
+    for i in range(len(portfolio)):
+        overlaps = overlaps_with(bitsets, bitsets[i])
+        overlaps[i] = 0
+        assert overlaps.max() <= 2
+    assert len(pd.read_csv(tmp_path / 'portfolio.csv', header=None)) == 150
@@ -0,0 +1,64 @@
+import pytest
+
+from main import LineupConfig, OptimizationParams, calculate_lineups, load_players
+from sharding import FileQueueExecutor, LocalProcessExecutor
+
+
+@pytest.fixture(scope='module')
+def players():
+    return load_players('./tests/draftkings.csv')
+
+
+@pytest.fixture(scope='module')
+def sequential_scores(players, tmp_path_factory):
+    output_file = tmp_path_factory.mktemp('sequential') / 'three_rb'
+    lineups = calculate_lineups(
+        LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1), str(output_file), players, OptimizationParams()
+    )
+    return [round(lineup.total_score, 1) for lineup in lineups]
+
+
+@pytest.mark.parametrize('shard_by', ['QB', 'QB_DST'])
+def test_sharded_matches_sequential(players, sequential_scores, tmp_path, shard_by):
+    """Test that the merged shard results match the single-process enumeration"""
+    params = OptimizationParams(shard_by=shard_by)
+    lineups = calculate_lineups(
+        LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1),
+        str(tmp_path / 'three_rb'),
+        players,
+        params,
+        shard_executor=LocalProcessExecutor(max_workers=2),
+    )
+
+    assert [round(lineup.total_score, 1) for lineup in lineups] == sequential_scores
+    assert [lineup.lineup_number for lineup in lineups] == list(range(1, len(lineups) + 1))
+
+
+def test_file_queue_executor(players, sequential_scores, tmp_path):
+    """Test that the shared-directory work queue produces the same lineups and leaves no tasks behind"""
+    queue_dir = tmp_path / 'queue'
+    lineups = calculate_lineups(
+        LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1),
+        str(tmp_path / 'three_rb'),
+        players,
+        OptimizationParams(shard_by='QB'),
+        shard_executor=FileQueueExecutor(queue_dir),
+    )
+
+    assert [round(lineup.total_score, 1) for lineup in lineups] == sequential_scores
+    assert not any((queue_dir / 'queue').iterdir())
+    assert not any((queue_dir / 'results').iterdir())
+
+
+def test_sharded_respects_must_include(players, tmp_path):
+    """Test that a must-include QB is honored when sharding by QB"""
+    lineups = calculate_lineups(
+        LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1),
+        str(tmp_path / 'three_rb'),
+        players,
+        OptimizationParams(shard_by='QB', must_include_players=['Josh Allen']),
+        shard_executor=LocalProcessExecutor(max_workers=2),
+    )
+
+    assert lineups
+    assert all(any(p.name == 'Josh Allen' for p in lineup.players) for lineup in lineups)
@@ -0,0 +1,124 @@
+import itertools
+import time
+from collections import Counter
+from collections.abc import Callable
+
+import numpy as np
+
+from main import OptimizationParams, Player, read_lineups_csv
+from showdown import CAPTAIN, ShowdownConfig, showdown_lineups
+
+
+def make_pool(size: int, seed: int) -> list[Player]:
+    rng = np.random.default_rng(seed)
+    positions = ('QB', 'RB', 'WR', 'WR', 'TE', 'K', 'DST')
+    players = []
+    for i in range(size):
+        salary = int(rng.integers(10, 120)) * 100
+        players.append(
+            Player(
+                name=f'Player {i}',
+                position=positions[i % len(positions)],
+                salary=salary,
+                projection=round(salary / 1000 * rng.uniform(1.5, 3.5), 1),
+                team='AAA' if i % 2 else 'BBB',
+            )
+        )
+    return players
+
+
+def brute_force_scores(
+    players: list[Player], config: ShowdownConfig, salary_cap: int, allowed: Callable[[tuple], bool] | None = None
+) -> list[float]:
+    scores = []
+    for roster in itertools.combinations(players, config.total_players()):
+        teams = {p.team for p in roster}
+        if allowed is not None and not allowed(roster):
+            continue
+        for captain in roster:
+            bonus = config.captain_multiplier - 1
+            salary = sum(p.salary for p in roster) + round(captain.salary * config.captain_multiplier) - captain.salary
+            if salary <= salary_cap and len(teams) > 1:
+                scores.append(sum(p.projection for p in roster) + bonus * captain.projection)
+    return sorted(scores, reverse=True)
+
+
+def test_showdown_matches_brute_force(tmp_path):
+    """Test that enumeration returns the exact top captain lineups, each roster and captain pair once"""
+    players = make_pool(12, seed=1)
+    config = ShowdownConfig()
+    params = OptimizationParams(salary_cap=30000)
+    lineups = showdown_lineups(players, config, params, max_lineups=15, output_file=tmp_path / 'showdown.csv')
+
+    expected = brute_force_scores(players, config, params.salary_cap)[:15]
+    assert [round(lineup.total_score, 6) for lineup in lineups] == [round(score, 6) for score in expected]
+
+    keys = {(lineup.players[0].name, frozenset(p.name for p in lineup.players)) for lineup in lineups}
+    assert len(keys) == 15
+    for lineup in lineups:
+        assert [p.position for p in lineup.players].count(CAPTAIN) == 1
+        assert lineup.players[0].position == CAPTAIN
+        assert lineup.total_salary <= params.salary_cap
+
+    assert [lineup.total_score for lineup in read_lineups_csv(tmp_path / 'showdown.csv')] == [
+        round(lineup.total_score, 1) for lineup in lineups
+    ]
+
+
+def test_showdown_team_rules():
+    """Test that the team cap and QB stack apply to showdown lineups"""
+    players = make_pool(12, seed=1)
+    config = ShowdownConfig()
+    params = OptimizationParams(salary_cap=30000, max_players_per_team=4, qb_stack=1)
+    lineups = showdown_lineups(players, config, params, max_lineups=15)
+
+    def allowed(roster: tuple) -> bool:
+        stacked = all(
+            any(p.team == qb.team and p.position in ('WR', 'TE') for p in roster)
+            for qb in roster
+            if qb.position == 'QB'
+        )
+        return stacked and max(Counter(p.team for p in roster).values()) <= 4
+
+    expected = brute_force_scores(players, config, params.salary_cap, allowed)[:15]
+    assert expected != brute_force_scores(players, config, params.salary_cap)[:15]
+    assert [round(lineup.total_score, 6) for lineup in lineups] == [round(score, 6) for score in expected]
+
+
+def test_showdown_opponent_rules():
+    """Test that the bring-back and DST rules use the other team of a two-team pool as the opponent"""
+    players = make_pool(12, seed=1)
+    config = ShowdownConfig()
+    params = OptimizationParams(salary_cap=30000, bring_back=1, no_dst_vs_qb=True)
+    lineups = showdown_lineups(players, config, params, max_lineups=15)
+
+    def allowed(roster: tuple) -> bool:
+        for qb in roster:
+            if qb.position != 'QB':
+                continue
+            others = [p for p in roster if p.team != qb.team]
+            if not any(p.position in ('RB', 'WR', 'TE') for p in others):
+                return False
+            if any(p.position == 'DST' for p in others):
+                return False
+        return True
+
+    expected = brute_force_scores(players, config, params.salary_cap, allowed)[:15]
+    assert expected != brute_force_scores(players, config, params.salary_cap)[:15]
+    assert [round(lineup.total_score, 6) for lineup in lineups] == [round(score, 6) for score in expected]
+
+
+def test_showdown_large_pool_is_fast():
+    """Test top-K enumeration on a 60-player pool with must-include players"""
+    players = make_pool(60, seed=2)
+    params = OptimizationParams(must_include_players=['Player 3'])
+
+    start = time.perf_counter()
+    lineups = showdown_lineups(players, params=params, max_lineups=20)
+    assert time.perf_counter() - start < 60
+
+    assert len(lineups) == 20
+    scores = [lineup.total_score for lineup in lineups]
+    assert all(a >= b - 1e-6 for a, b in itertools.pairwise(scores))
+    assert all('Player 3' in {p.name for p in lineup.players} for lineup in lineups)
+    assert all(len({p.name for p in lineup.players}) == 6 for lineup in lineups)
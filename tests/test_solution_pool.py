@@ -0,0 +1,121 @@
+import pytest
+
+from main import (
+    LineupConfig,
+    OptimizationParams,
+    Player,
+    calculate_lineups,
+    filter_players,
+    group_by_position,
+    load_players,
+)
+from solution_pool import SolutionPool
+from solver import get_solver_session
+
+LINEUP_CONFIG = LineupConfig(QB=1, RB=2, WR=4, TE=1, DST=1)
+
+
+@pytest.fixture(scope='module')
+def players():
+    return load_players('./tests/draftkings.csv')
+
+
+def test_resume_matches_fresh_run(tmp_path, players):
+    """Test that asking a pool for more lineups only solves the new ones and matches a fresh run"""
+    pool = SolutionPool(tmp_path / 'pool.sqlite')
+    params = OptimizationParams()
+    session = get_solver_session()
+
+    first = calculate_lineups(
+        LINEUP_CONFIG, str(tmp_path / 'first'), players, params, max_lineups=5, solution_pool=pool
+    )
+    assert len(first) == 5
+
+    solves_before = session.stats.solves
+    resumed = calculate_lineups(
+        LINEUP_CONFIG, str(tmp_path / 'resumed'), players, params, max_lineups=12, solution_pool=pool
+    )
+    assert session.stats.solves - solves_before == 7
+
+    fresh = calculate_lineups(LINEUP_CONFIG, str(tmp_path / 'fresh'), players, params, max_lineups=12)
+    assert [lineup.lineup_number for lineup in resumed] == list(range(1, 13))
+    assert [lineup.total_score for lineup in resumed] == pytest.approx([lineup.total_score for lineup in fresh])
+    assert resumed[:5] == first
+
+    # Everything asked for is already stored, so this run does not solve
+    solves_before = session.stats.solves
+    again = calculate_lineups(
+        LINEUP_CONFIG, str(tmp_path / 'again'), players, params, max_lineups=8, solution_pool=pool
+    )
+    assert session.stats.solves == solves_before
+    assert again == resumed[:8]
+
+
+def test_exhausted_run_is_not_solved_again(tmp_path):
+    """Test that a pool that ran out of lineups is stored as exhausted with only full lineups and never re-solved"""
+    positions = ['QB', 'RB', 'RB', 'WR', 'WR', 'WR', 'WR', 'WR', 'TE', 'DST']
+    small_pool = [
+        Player(name=f'Player {i}', position=pos, salary=5000, projection=10.0 + i) for i, pos in enumerate(positions)
+    ]
+    pool = SolutionPool(tmp_path / 'pool.sqlite')
+    params = OptimizationParams()
+    session = get_solver_session()
+
+    first = calculate_lineups(
+        LINEUP_CONFIG, str(tmp_path / 'first'), small_pool, params, max_lineups=10, solution_pool=pool
+    )
+    assert len(first) == 5
+
+    stored = pool.load(group_by_position(filter_players(small_pool, params)), LINEUP_CONFIG, params)
+    assert stored.exhausted
+    assert len(stored.cuts) == 5
+    assert all(len(cut) == LINEUP_CONFIG.total_players() for cut in stored.cuts)
+    assert stored.lineups == first
+
+    solves_before = session.stats.solves
+    again = calculate_lineups(
+        LINEUP_CONFIG, str(tmp_path / 'again'), small_pool, params, max_lineups=20, solution_pool=pool
+    )
+    assert session.stats.solves == solves_before
+    assert again == first
+
+
+def test_pool_keyed_by_slate_config_and_params(tmp_path, players):
+    """Test that runs with a different pool, config or params do not reuse stored lineups"""
+    pool = SolutionPool(tmp_path / 'pool.sqlite')
+    session = get_solver_session()
+    best = calculate_lineups(
+        LINEUP_CONFIG, str(tmp_path / 'all'), players, OptimizationParams(), max_lineups=3, solution_pool=pool
+    )
+    excluded = best[0].players[0].name
+
+    runs = [
+        (LINEUP_CONFIG, OptimizationParams(exclude_players=[excluded])),
+        (LINEUP_CONFIG, OptimizationParams(max_gap_from_optimal=5)),
+        (LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1), OptimizationParams()),
+    ]
+    for lineup_config, params in runs:
+        solves_before = session.stats.solves
+        lineups = calculate_lineups(
+            lineup_config, str(tmp_path / 'other'), players, params, max_lineups=3, solution_pool=pool
+        )
+        assert session.stats.solves - solves_before == 3
+        assert len(lineups) == 3
+
+
+def test_lineups_with_player(tmp_path, players):
+    """Test that stored lineups are found by player without solving"""
+    pool = SolutionPool(tmp_path / 'pool.sqlite')
+    lineups = calculate_lineups(
+        LINEUP_CONFIG, str(tmp_path / 'stored'), players, OptimizationParams(), max_lineups=6, solution_pool=pool
+    )
+    name = lineups[-1].players[-1].name
+
+    session = get_solver_session()
+    solves_before = session.stats.solves
+    found = pool.lineups_with_player(name)
+    assert session.stats.solves == solves_before
+
+    expected = [lineup for lineup in lineups if any(p.name == name for p in lineup.players)]
+    assert found == sorted(expected, key=lambda lineup: -lineup.total_score)
+    assert pool.lineups_with_player('Nobody') == []
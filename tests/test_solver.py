@@ -0,0 +1,29 @@
+import os
+
+from main import LineupConfig, OptimizationParams, calculate_lineups, load_players
+from solver import get_solver_session, ram_tmp_dir
+
+LINEUP_CONFIG = LineupConfig(QB=1, RB=2, WR=4, TE=1, DST=1)
+
+
+def test_ram_tmp_dir_is_writable():
+    assert os.access(ram_tmp_dir(), os.W_OK)
+
+
+def test_session_counts_solves(tmp_path):
+    """Test that one enumeration reuses the process session and records every solve"""
+    session = get_solver_session()
+    assert get_solver_session() is session
+
+    solves_before = session.stats.solves
+    lineups = calculate_lineups(
+        LINEUP_CONFIG, str(tmp_path / 'four_wr'), load_players('./tests/draftkings.csv'), OptimizationParams()
+    )
+    assert len(lineups) == 10
+    assert session.stats.solves - solves_before == 10
+    assert session.stats.per_solve_ms() > 0
+
+
+def test_time_limit_is_wall_clock():
+    """Test that cbc counts the time limit in elapsed time rather than CPU time"""
+    assert get_solver_session()._cbc(5).optionsDict['timeMode'] == 'elapsed'
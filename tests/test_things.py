@@ -1,41 +1,57 @@
+import io
 import os
+import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from main import LineupConfig, OptimizationParams, calculate_lineups, generate_lineup_files, validate_players_data
-
-
-@pytest.fixture(scope='module', autouse=True)
-def generate_files():
-    generate_lineup_files('./tests/draftkings.csv')
-
-
-def test_generate_lineup_files():
-    assert os.path.exists('four_wr.csv')
-    assert os.path.exists('three_rb.csv')
-    assert os.path.exists('two_te.csv')
-
-
-def test_generate_lineup_files_no_two_te():
-    try:
-        # The fixture runs before this test and creates two_te.csv, so remove it first
-        if os.path.exists('two_te.csv'):
-            os.remove('two_te.csv')
-
-        generate_lineup_files('./tests/draftkings.csv', allow_two_te=False)
-
-        assert os.path.exists('four_wr.csv')
-        assert os.path.exists('three_rb.csv')
-        assert not os.path.exists('two_te.csv')
-    finally:
-        # Restore files for other tests since fixture is now module scoped
-        generate_lineup_files('./tests/draftkings.csv')
-
-
-def test_four_wr():
-    with open('four_wr.csv', 'r') as f:
+import main
+from main import (
+    PRINTED_LINEUPS,
+    Lineup,
+    LineupConfig,
+    LineupPlayer,
+    OptimizationParams,
+    Player,
+    PlayerColumns,
+    calculate_lineups,
+    generate_lineup_files,
+    load_players,
+    optimize_lineups,
+    player_cache_path,
+    read_lineups_csv,
+    validate_players_data,
+    write_combined_lineups,
+)
+from solver import get_solver_session
+
+
+@pytest.fixture(scope='module')
+def generated_dir(tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp('generated')
+    generate_lineup_files('./tests/draftkings.csv', output_dir=output_dir)
+    return output_dir
+
+
+def test_generate_lineup_files(generated_dir):
+    assert (generated_dir / 'four_wr.csv').exists()
+    assert (generated_dir / 'three_rb.csv').exists()
+    assert (generated_dir / 'two_te.csv').exists()
+
+
+def test_generate_lineup_files_no_two_te(tmp_path):
+    generate_lineup_files('./tests/draftkings.csv', allow_two_te=False, output_dir=tmp_path)
+
+    assert (tmp_path / 'four_wr.csv').exists()
+    assert (tmp_path / 'three_rb.csv').exists()
+    assert not (tmp_path / 'two_te.csv').exists()
+
+
+def test_four_wr(generated_dir):
+    with open(generated_dir / 'four_wr.csv', 'r') as f:
         four_wr = [f.readline().strip() for _ in range(10)]
 
     # because of the duplicate scores, the results are not always returned in the same order
@@ -56,8 +72,8 @@ def test_four_wr():
     assert all(conditions)
 
 
-def test_three_rb():
-    with open('three_rb.csv', 'r') as f:
+def test_three_rb(generated_dir):
+    with open(generated_dir / 'three_rb.csv', 'r') as f:
         three_rb = [f.readline().strip() for _ in range(10)]
 
     conditions = [
@@ -77,8 +93,8 @@ def test_three_rb():
     assert all(conditions)
 
 
-def test_two_te():
-    with open('two_te.csv', 'r') as f:
+def test_two_te(generated_dir):
+    with open(generated_dir / 'two_te.csv', 'r') as f:
         two_te = [f.readline().strip() for _ in range(10)]
 
     conditions = [
@@ -138,7 +154,8 @@ def test_only_use_players():
             'CeeDee Lamb',
             "Ja'Marr Chase",
             'Tyreek Hill',
-            'Chris Olave',  # WRs
+            'Chris Olave',
+            'Cedric Tillman',  # WRs
             'Trey McBride',
             'Mike Gesicki',  # TEs
             'Ravens',
@@ -156,6 +173,9 @@ def test_only_use_players():
 
         # Verify at least one lineup was generated with the restricted player pool
         assert len(df) > 0, 'No lineups generated with only_use_players restriction'
+        only_use_names = {name.strip() for name in only_use}
+        for lineup in read_lineups_csv(output_file + '.csv'):
+            assert {p.name for p in lineup.players} <= only_use_names
 
         # Parse the lineup to check that only specified players are used
         for _, row in df.iterrows():
@@ -305,11 +325,9 @@ def test_missing_exclude_player_warning(capsys):
             os.remove(output_file + '.csv')
 
 
-def test_combined_lineups_sorted():
+def test_combined_lineups_sorted(generated_dir):
     """Test that combined lineups are sorted by Total Score in descending order"""
-    generate_lineup_files('./tests/draftkings.csv')
-
-    df = pd.read_csv('combined_lineups.csv', header=None)
+    df = pd.read_csv(generated_dir / 'combined_lineups.csv', header=None)
     n = df.shape[1]
     df.columns = [f'col{i}' for i in range(n - 2)] + ['Total Salary', 'Total Score']
 
@@ -321,25 +339,25 @@ def test_combined_lineups_sorted():
     assert scores == sorted(scores, reverse=True), 'Combined lineups not sorted by score in descending order'
 
 
-def test_generate_lineup_files_creates_combined(capsys):
+def test_generate_lineup_files_creates_combined(tmp_path, capsys):
     """Test that generate_lineup_files creates combined_lineups.csv and prints output"""
-    generate_lineup_files('./tests/draftkings.csv')
+    generate_lineup_files('./tests/draftkings.csv', output_dir=tmp_path)
 
     # Check that combined_lineups.csv exists
-    assert os.path.exists('combined_lineups.csv'), 'combined_lineups.csv not created'
+    assert (tmp_path / 'combined_lineups.csv').exists(), 'combined_lineups.csv not created'
 
     # Check console output
     captured = capsys.readouterr()
     assert 'Lineup files created' in captured.out
 
     # Verify the combined file has content
-    df = pd.read_csv('combined_lineups.csv', header=None)
+    df = pd.read_csv(tmp_path / 'combined_lineups.csv', header=None)
     assert len(df) > 0, 'combined_lineups.csv is empty'
 
 
-def test_string_truncation_in_output(capsys):
+def test_string_truncation_in_output(tmp_path, capsys):
     """Test that strings are truncated to 12 characters in the printed output"""
-    generate_lineup_files('./tests/draftkings.csv')
+    generate_lineup_files('./tests/draftkings.csv', output_dir=tmp_path)
 
     captured = capsys.readouterr()
     output_lines = captured.out.split('\n')
@@ -418,3 +436,464 @@ def test_position_constraints():
     finally:
         if os.path.exists(output_file + '.csv'):
             os.remove(output_file + '.csv')
+
+
+def test_enumeration_stops_when_pool_runs_out(tmp_path):
+    """Test that a pool with fewer lineups than max_lineups yields only its full lineups, best first"""
+    positions = ['QB', 'RB', 'RB', 'WR', 'WR', 'WR', 'WR', 'WR', 'TE', 'DST']
+    players = [
+        Player(name=f'Player {i}', position=pos, salary=5000, projection=10.0 + i) for i, pos in enumerate(positions)
+    ]
+    lineup_config = LineupConfig(QB=1, RB=2, WR=4, TE=1, DST=1)
+
+    lineups = calculate_lineups(lineup_config, str(tmp_path / 'small'), players, OptimizationParams(), max_lineups=10)
+
+    # Four of the five WRs can be picked five ways
+    assert len(lineups) == 5
+    assert all(len(lineup.players) == 9 for lineup in lineups)
+    scores = [lineup.total_score for lineup in lineups]
+    assert scores == sorted(scores, reverse=True)
+    assert len(read_lineups_csv(tmp_path / 'small.csv')) == 5
+
+
+def test_load_players_parquet(tmp_path):
+    """Test that Parquet input produces the same player pool as CSV"""
+
+    parquet_file = tmp_path / 'draftkings.parquet'
+    pd.read_csv('./tests/draftkings.csv').to_parquet(parquet_file)
+
+    assert load_players(parquet_file) == load_players('./tests/draftkings.csv')
+
+
+def test_load_players_cache(tmp_path):
+    """Test that the binary player cache is written once and reused while the source is unchanged"""
+    csv_file = tmp_path / 'draftkings.csv'
+    shutil.copy('./tests/draftkings.csv', csv_file)
+
+    players = load_players(csv_file, use_cache=True)
+    cache_file = player_cache_path(csv_file)
+    assert cache_file.exists(), 'Player cache not written'
+
+    cache_mtime = cache_file.stat().st_mtime_ns
+    assert load_players(csv_file, use_cache=True) == players
+    assert cache_file.stat().st_mtime_ns == cache_mtime, 'Player cache rewritten for unchanged source'
+
+
+def test_load_players_cache_column_mappings(tmp_path):
+    """Test that one file loaded through two column mappings gets one cache per mapping"""
+    csv_file = tmp_path / 'draftkings.csv'
+    df = pd.read_csv('./tests/draftkings.csv')
+    df['Alt Proj'] = df['DK Proj'] + 1
+    df['Own'] = 10.0
+    df.to_csv(csv_file, index=False)
+    alt_columns = PlayerColumns(projection='Alt Proj', ownership='Own')
+
+    dk_players = load_players(csv_file, use_cache=True)
+    alt_players = load_players(csv_file, use_cache=True, columns=alt_columns)
+    assert player_cache_path(csv_file) != player_cache_path(csv_file, columns=alt_columns)
+    assert player_cache_path(csv_file, columns=alt_columns).exists()
+
+    assert [p.projection + 1 for p in dk_players] == pytest.approx([p.projection for p in alt_players])
+    assert all(p.ownership is None for p in dk_players)
+    assert all(p.ownership == 10.0 for p in alt_players)
+
+    assert load_players(csv_file, use_cache=True) == dk_players
+    assert load_players(csv_file, use_cache=True, columns=alt_columns) == alt_players
+
+
+def test_generate_lineup_files_multi_slate(tmp_path, monkeypatch):
+    """Test that a multi-slate file is read once and written to one output directory per slate"""
+    df = pd.read_csv('./tests/draftkings.csv')
+    early, late = df.copy(), df.copy()
+    early['Slate'] = 'Early'
+    late['Slate'] = 'Late'
+    late['DK Proj'] = late['DK Proj'] * 2
+    input_file = tmp_path / 'all_slates.csv'
+    pd.concat([early, late]).to_csv(input_file, index=False)
+
+    monkeypatch.chdir(tmp_path)
+    generate_lineup_files(input_file, allow_two_te=False, slate_column='Slate', max_workers=2)
+
+    for slate in ('Early', 'Late'):
+        assert (tmp_path / slate / 'four_wr.csv').exists()
+        assert (tmp_path / slate / 'three_rb.csv').exists()
+        assert not (tmp_path / slate / 'two_te.csv').exists()
+        assert (tmp_path / slate / 'combined_lineups.csv').exists()
+
+    summary = pd.read_csv(tmp_path / 'slate_summary.csv').set_index('Slate')
+    assert summary.loc['Early', 'Best Score'] == pytest.approx(148.2)
+    assert summary.loc['Late', 'Best Score'] == pytest.approx(296.4)
+
+
+def test_generate_lineup_files_slate_dir_collisions(tmp_path):
+    """Test that slates whose names sanitize alike get separate directories under the output root"""
+    df = pd.read_csv('./tests/draftkings.csv')
+    first, second = df.copy(), df.copy()
+    first['Slate'] = 'Early Game'
+    second['Slate'] = 'Early/Game'
+    second['DK Proj'] = second['DK Proj'] * 2
+    input_file = tmp_path / 'all_slates.csv'
+    pd.concat([first, second]).to_csv(input_file, index=False)
+
+    output_dir = tmp_path / 'out'
+    generate_lineup_files(input_file, allow_two_te=False, slate_column='Slate', max_lineups=2, output_dir=output_dir)
+
+    summary = pd.read_csv(output_dir / 'slate_summary.csv').set_index('Slate')
+    assert summary.loc['Early Game', 'Output Directory'] == str(output_dir.resolve() / 'Early_Game')
+    assert summary.loc['Early/Game', 'Output Directory'] == str(output_dir.resolve() / 'Early_Game_2')
+    first_best = read_lineups_csv(output_dir / 'Early_Game' / 'combined_lineups.csv')[0]
+    second_best = read_lineups_csv(output_dir / 'Early_Game_2' / 'combined_lineups.csv')[0]
+    assert second_best.total_score == pytest.approx(2 * first_best.total_score, abs=0.1)
+
+
+def test_perturbed_lineups_reproducible(tmp_path):
+    """Test that randomized generation is reproducible from the seed and yields unique lineups"""
+    lineup_config = LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1)
+    params = OptimizationParams(perturbation=0.3, perturbed_solves=12, random_seed=7, max_workers=2)
+    players = load_players('./tests/draftkings.csv')
+
+    first = calculate_lineups(lineup_config, str(tmp_path / 'first'), players, params)
+    second = calculate_lineups(lineup_config, str(tmp_path / 'second'), players, params)
+
+    assert first, 'No lineups generated in randomized mode'
+    assert first == second, 'Randomized lineups differ for the same seed'
+
+    player_sets = [frozenset(p.name for p in lineup.players) for lineup in first]
+    assert len(player_sets) == len(set(player_sets)), 'Duplicate lineup found'
+
+    scores = [lineup.total_score for lineup in first]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] <= 148.2 + 1e-6
+
+
+def test_max_gap_from_optimal_stops_early(tmp_path):
+    """Test that enumeration stops once lineups fall outside the allowed gap or below the minimum score"""
+    lineup_config = LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1)
+    players = load_players('./tests/draftkings.csv')
+
+    within_gap = calculate_lineups(
+        lineup_config, str(tmp_path / 'gap'), players, OptimizationParams(max_gap_from_optimal=0.2)
+    )
+    assert [round(lineup.total_score, 1) for lineup in within_gap] == [148.2, 148.0, 148.0]
+
+    above_min = calculate_lineups(lineup_config, str(tmp_path / 'min'), players, OptimizationParams(min_score=147.9))
+    assert len(above_min) == 6
+
+    assert calculate_lineups(lineup_config, str(tmp_path / 'none'), players, OptimizationParams(min_score=200)) == []
+
+
+def test_calculate_lineups_without_output_file_labels_messages(capsys):
+    """Test that a run with no output file is labelled by name, or 'lineups' by default, in messages"""
+    lineup_config = LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1)
+    players = load_players('./tests/draftkings.csv')
+    params = OptimizationParams(min_score=200)
+
+    assert calculate_lineups(lineup_config, None, players, params) == []
+    assert 'Skipping lineups:' in capsys.readouterr().out
+
+    assert calculate_lineups(lineup_config, None, players, params, name='three_rb') == []
+    assert 'Skipping three_rb:' in capsys.readouterr().out
+
+
+def test_generate_lineup_files_top_n(tmp_path, monkeypatch):
+    """Test that pruning configs against the top-N cutoff keeps the same top-N lineups"""
+    csv_file = os.path.abspath('./tests/draftkings.csv')
+    monkeypatch.chdir(tmp_path)
+
+    generate_lineup_files(csv_file)
+    expected = pd.read_csv('combined_lineups.csv', header=None).iloc[:5, -1].tolist()
+
+    generate_lineup_files(csv_file, top_n=5)
+    pruned = pd.read_csv('combined_lineups.csv', header=None)
+
+    assert pruned.iloc[:5, -1].tolist() == expected
+    assert len(pruned) < 30, 'No lineups were pruned'
+
+
+def test_generate_lineup_files_multi_slate_top_n(tmp_path):
+    """Test that top_n prunes every slate's configs and keeps each slate's top-N lineups"""
+    df = pd.read_csv('./tests/draftkings.csv')
+    early, late = df.copy(), df.copy()
+    early['Slate'] = 'Early'
+    late['Slate'] = 'Late'
+    late['DK Proj'] = late['DK Proj'] * 2
+    input_file = tmp_path / 'all_slates.csv'
+    pd.concat([early, late]).to_csv(input_file, index=False)
+
+    generate_lineup_files(input_file, slate_column='Slate', output_dir=tmp_path / 'full')
+    generate_lineup_files(input_file, slate_column='Slate', output_dir=tmp_path / 'pruned', top_n=5)
+
+    for slate in ('Early', 'Late'):
+        expected = pd.read_csv(tmp_path / 'full' / slate / 'combined_lineups.csv', header=None)
+        pruned = pd.read_csv(tmp_path / 'pruned' / slate / 'combined_lineups.csv', header=None)
+        assert pruned.iloc[:5, -1].tolist() == expected.iloc[:5, -1].tolist()
+        assert len(pruned) < len(expected), f'No lineups were pruned for {slate}'
+
+
+def test_sensitivity_report(tmp_path):
+    """Test that break-even points match re-running with the player forced in or excluded"""
+    lineup_config = LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1)
+    players = load_players('./tests/draftkings.csv')
+    output_file = str(tmp_path / 'three_rb')
+    session = get_solver_session()
+
+    solves = session.stats.solves
+    calculate_lineups(lineup_config, output_file, players, OptimizationParams(sensitivity_report=True))
+    pruned_solves = session.stats.solves - solves
+    report = pd.read_csv(output_file + '_sensitivity.csv').set_index(['Position', 'Player'])
+
+    solves = session.stats.solves
+    exact_params = OptimizationParams(sensitivity_report=True, sensitivity_window=None)
+    calculate_lineups(lineup_config, str(tmp_path / 'exact'), players, exact_params)
+    exact_solves = session.stats.solves - solves
+    exact_report = pd.read_csv(str(tmp_path / 'exact') + '_sensitivity.csv').set_index(['Position', 'Player'])
+
+    assert len(report) == len(players)
+    assert report['In Optimal'].sum() == lineup_config.total_players()
+    assert exact_report['Exact'].all()
+    assert not report['Exact'].all(), 'No player was pruned by its bound'
+    assert pruned_solves < exact_solves
+
+    # Exact rows agree, and pruned rows never understate the change needed
+    exact_rows = report['Exact']
+    assert report.loc[exact_rows, 'Change Needed'].tolist() == exact_report.loc[exact_rows, 'Change Needed'].tolist()
+    assert (report['Change Needed'].abs() <= exact_report['Change Needed'].abs() + 1e-6).all()
+
+    outsiders = report[~report['In Optimal'] & report['Exact']]
+    _, outsider = outsiders['Change Needed'].idxmax()
+    forced_in = calculate_lineups(
+        lineup_config, str(tmp_path / 'forced'), players, OptimizationParams(must_include_players=[outsider])
+    )
+    assert outsiders.xs(outsider, level='Player')['Alternative Score'].item() == pytest.approx(forced_in[0].total_score)
+
+    _, insider = report[report['In Optimal']].index[0]
+    excluded = calculate_lineups(
+        lineup_config, str(tmp_path / 'excluded'), players, OptimizationParams(exclude_players=[insider])
+    )
+    assert exact_report.xs(insider, level='Player')['Alternative Score'].item() == pytest.approx(
+        excluded[0].total_score
+    )
+    assert exact_report.xs(insider, level='Player')['Change Needed'].item() <= 0
+
+
+def test_sensitivity_report_same_name_positions(tmp_path):
+    """Test that players sharing a name at different positions get their own rows"""
+    lineup_config = LineupConfig(QB=1, RB=3, WR=3, TE=1, DST=1)
+    players = load_players('./tests/draftkings.csv')
+    params = OptimizationParams(sensitivity_report=True)
+    optimal = calculate_lineups(lineup_config, None, players, OptimizationParams())[0]
+    wr = next(player for player in optimal.players if player.position == 'WR')
+    twin = next(player for player in players if player.name == wr.name).model_copy(
+        update={'position': 'TE', 'projection': 0.0}
+    )
+
+    output_file = str(tmp_path / 'twins')
+    calculate_lineups(lineup_config, output_file, [*players, twin], params)
+    report = pd.read_csv(output_file + '_sensitivity.csv').set_index(['Position', 'Player'])
+
+    assert report.loc[('WR', wr.name), 'In Optimal']
+    assert not report.loc[('TE', wr.name), 'In Optimal']
+    assert report.loc[('TE', wr.name), 'Change Needed'] > 0
+
+
+def test_generate_lineup_files_time_budget(tmp_path, monkeypatch, capsys):
+    """Test that a deadline run writes what it found and marks truncated configs"""
+    csv_file = os.path.abspath('./tests/draftkings.csv')
+    monkeypatch.chdir(tmp_path)
+
+    # Every solve takes one second on a fake clock, so each config's share of a 12 s budget fits 4 solves
+    now = [0.0]
+    real_solve = main._solve
+
+    def timed_solve(*args, **kwargs):
+        status = real_solve(*args, **kwargs)
+        now[0] += 1
+        return status
+
+    with monkeypatch.context() as patched:
+        patched.setattr(main, '_solve', timed_solve)
+        patched.setattr(main.time, 'monotonic', lambda: now[0])
+        generate_lineup_files(csv_file, time_budget=12)
+
+    status = pd.read_csv('lineup_status.csv').set_index('Config')
+    assert set(status.index) == {'four_wr', 'three_rb', 'two_te'}
+    assert (status['Status'] == 'truncated').all()
+    assert (status['Lineups'] == 4).all()
+    assert 'truncated' in capsys.readouterr().out
+    for name in status.index:
+        assert len(pd.read_csv(f'{name}.csv', header=None)) == 4
+    assert len(pd.read_csv('combined_lineups.csv', header=None)) == 12
+
+    generate_lineup_files(csv_file, time_budget=120)
+    status = pd.read_csv('lineup_status.csv').set_index('Config')
+    assert (status['Status'] == 'complete').all()
+    assert (status['Lineups'] == 10).all()
+    assert len(pd.read_csv('combined_lineups.csv', header=None)) == 30
+
+
+def test_generate_lineup_files_multi_slate_time_budget(tmp_path):
+    """Test that a multi-slate run applies the budget to every slate and writes a status file per slate"""
+    df = pd.read_csv('./tests/draftkings.csv')
+    early, late = df.copy(), df.copy()
+    early['Slate'] = 'Early'
+    late['Slate'] = 'Late'
+    input_file = tmp_path / 'all_slates.csv'
+    pd.concat([early, late]).to_csv(input_file, index=False)
+
+    generate_lineup_files(input_file, slate_column='Slate', time_budget=0, output_dir=tmp_path / 'locked')
+    generate_lineup_files(input_file, slate_column='Slate', time_budget=120, output_dir=tmp_path / 'open')
+
+    for slate in ('Early', 'Late'):
+        locked = pd.read_csv(tmp_path / 'locked' / slate / 'lineup_status.csv')
+        assert (locked['Status'] == 'truncated').all()
+        assert (locked['Lineups'] == 0).all()
+
+        finished = pd.read_csv(tmp_path / 'open' / slate / 'lineup_status.csv')
+        assert (finished['Status'] == 'complete').all()
+        assert (finished['Lineups'] == 10).all()
+
+
+def test_generate_lineup_files_memory_profile_rejects_slates(tmp_path):
+    """Test that memory profiling is refused for multi-slate runs, whose slates run in untraced workers"""
+    with pytest.raises(ValueError, match='memory_profile'):
+        generate_lineup_files('./tests/draftkings.csv', slate_column='Slate', memory_profile=tmp_path / 'memory.csv')
+
+
+def test_write_combined_lineups_merges_sorted_configs(tmp_path, capsys):
+    """Test that thousands of per-config lineups are merged in score order and only the top rows are printed"""
+    player = LineupPlayer(position='QB', name='A Very Long Player Name', salary=5000, projected_points=10.0)
+    configs = [
+        [
+            Lineup(lineup_number=n + 1, players=[player], total_salary=5000, total_score=1000 - n * step)
+            for n in range(2000)
+        ]
+        for step in (0.25, 0.3, 0.45)
+    ]
+
+    output_file = tmp_path / 'combined_lineups.csv'
+    write_combined_lineups(configs, output_file)
+
+    merged = read_lineups_csv(output_file)
+    assert len(merged) == 6000
+    scores = [lineup.total_score for lineup in merged]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[:3] == [1000, 1000, 1000]
+
+    printed = capsys.readouterr().out.strip().splitlines()
+    assert len(printed) == PRINTED_LINEUPS
+    assert 'A Very Long ' in printed[0]
+    assert 'A Very Long Player' not in printed[0]
+
+
+def test_team_stacking_rules(tmp_path, capsys, monkeypatch):
+    """Test that QB stacks, bring-backs and the DST rule hold in every lineup"""
+    rng = np.random.default_rng(5)
+    rows = []
+    for game in range(4):
+        for team, opponent in ((f'A{game}', f'B{game}'), (f'B{game}', f'A{game}')):
+            for pos, count in {'QB': 2, 'RB': 3, 'WR': 5, 'TE': 2, 'DST': 1}.items():
+                for i in range(count):
+                    salary = int(rng.integers(30, 90)) * 100
+                    rows.append(
+                        {
+                            'Player': f'{team} {pos}{i}',
+                            'DK Pos': pos,
+                            'DK Salary': salary,
+                            'DK Proj': round(salary / 1000 * rng.uniform(1.8, 3.2), 1),
+                            'Team': team,
+                            'Opp': opponent,
+                        }
+                    )
+    slate_file = tmp_path / 'slate.csv'
+    pd.DataFrame(rows).to_csv(slate_file, index=False)
+    teams = {row['Player']: (row['Team'], row['Opp']) for row in rows}
+
+    players = load_players(slate_file, columns=PlayerColumns(team='Team', opponent='Opp'))
+    lineup_config = LineupConfig(QB=1, RB=2, WR=4, TE=1, DST=1)
+    params = OptimizationParams(qb_stack=2, bring_back=1, no_dst_vs_qb=True, sensitivity_report=True)
+
+    # The enumeration and both sensitivity models share one team index
+    indexed = []
+    build_team_index = main.build_team_index
+    monkeypatch.setattr(
+        main, 'build_team_index', lambda player_data: indexed.append(player_data) or build_team_index(player_data)
+    )
+    lineups = calculate_lineups(lineup_config, str(tmp_path / 'stacked'), players, params)
+    monkeypatch.undo()
+
+    assert len(indexed) == 1
+    assert len(lineups) == 10
+    for lineup in lineups:
+        qb = next(p for p in lineup.players if p.position == 'QB')
+        qb_team, qb_opponent = teams[qb.name]
+        stack = [p for p in lineup.players if p.position in ('WR', 'TE') and teams[p.name][0] == qb_team]
+        bring_back = [p for p in lineup.players if p.position != 'DST' and teams[p.name][0] == qb_opponent]
+        dst = next(p for p in lineup.players if p.position == 'DST')
+        assert len(stack) >= 2
+        assert len(bring_back) >= 1
+        assert teams[dst.name][1] != qb_team
+
+    unstacked = calculate_lineups(lineup_config, str(tmp_path / 'plain'), players, OptimizationParams())
+    assert unstacked[0].total_score >= lineups[0].total_score
+
+    # Without team columns the rules cannot apply
+    calculate_lineups(lineup_config, str(tmp_path / 'no_teams'), load_players(slate_file), params)
+    assert 'Team rules need a team column' in capsys.readouterr().out
+
+
+def test_optimize_lineups_concurrent_runs(tmp_path, monkeypatch):
+    """Test that runs in threads with their own caps and outputs match sequential runs and write only their output"""
+    players = load_players('./tests/draftkings.csv')
+    configs = {'four_wr': LineupConfig(QB=1, RB=2, WR=4, TE=1, DST=1)}
+    monkeypatch.chdir(tmp_path)
+
+    def run(salary_cap, output):
+        params = OptimizationParams(salary_cap=salary_cap)
+        return optimize_lineups(players, configs, params, max_lineups=3, output=output)
+
+    caps = (50000, 45000, 42000)
+    stream = io.StringIO()
+    outputs = (tmp_path / 'run', stream, None)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(run, caps, outputs))
+
+    assert sorted(os.listdir(tmp_path)) == ['run']
+    assert sorted(os.listdir(tmp_path / 'run')) == ['combined_lineups.csv', 'four_wr.csv']
+    assert len(stream.getvalue().splitlines()) == 3
+
+    for salary_cap, result in zip(caps, results):
+        lineups = result.lineups_by_config['four_wr']
+        assert result.completed == {'four_wr': True}
+        assert all(lineup.total_salary <= salary_cap for lineup in lineups)
+        assert [lineup.total_score for lineup in lineups] == [
+            lineup.total_score for lineup in run(salary_cap, None).combined()
+        ]
+    assert results[0].combined()[0].total_score > results[2].combined()[0].total_score
+
+
+def test_generate_lineup_files_memory_profile(tmp_path, monkeypatch, capsys):
+    """Test that a profiled run reports every phase and attributes allocations to functions"""
+    csv_file = os.path.abspath('./tests/draftkings.csv')
+    monkeypatch.chdir(tmp_path)
+
+    generate_lineup_files(csv_file, top_n=15, memory_profile='memory.csv')
+    assert 'Memory profile written to memory.csv' in capsys.readouterr().out
+
+    phases = pd.read_csv('memory.csv').set_index('Phase')
+    assert set(phases.index) == {
+        'load_players',
+        'upper_bounds',
+        'config:four_wr',
+        'config:three_rb',
+        'config:two_te',
+        'combined_lineups',
+    }
+    assert phases.index[0] == 'load_players' and phases.index[-1] == 'combined_lineups'
+    assert (phases['Peak KiB'] >= phases['End KiB']).all()
+    assert (phases['Peak KiB'] > 0).all()
+
+    allocations = pd.read_csv('memory_allocations.csv')
+    assert set(allocations['Phase']) <= set(phases.index)
+    assert (allocations['Size KiB'] > 0).all()
+    assert 'validate_players_data' in set(allocations.loc[allocations['Phase'] == 'load_players', 'Function'])
+    assert '_make_lineup' in set(allocations['Function'])